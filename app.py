@@ -169,108 +169,347 @@
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import os
-import numpy as np
-from werkzeug.utils import secure_filename
+import base64
+import functools
 import tempfile
-import cv2
-import librosa
+import threading
+import time
+import numpy as np
 from model import MultimodalStressDetector
+from jobs import FAILED, JobError, JobManager, QueueFull
+from modality_pool import ModalityExtractionPool
+from phys_stream import PhysiologicalSession
+from sessions import SessionStore
+from webcam_stream import WebcamStreamSession
+from video_analysis import analyze_video
+import signal_io
+from feature_cache import FeatureCache, content_key
 
 app = Flask(__name__)
 CORS(app)
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
+# Uploads are decoded straight from the request body; nothing is written to disk.
 ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
 ALLOWED_AUDIO_EXTENSIONS = {'wav', 'mp3', 'ogg', 'm4a'}
+ALLOWED_VIDEO_EXTENSIONS = {'mp4', 'avi', 'mov', 'mkv', 'webm'}
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+# Videos get their own limit (raised per request in analyze_video_upload;
+# the upload is spooled to disk, not held in memory)
+MAX_VIDEO_CONTENT_LENGTH = int(os.environ.get('MAX_VIDEO_MB', 512)) * 1024 * 1024
 
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+# Errors for uploads the extractors could not use (these are never cached)
+NO_FACE_MESSAGE = 'No face could be detected in the image, or it could not be read.'
+UNREADABLE_AUDIO_MESSAGE = 'The audio could not be decoded.'
 
-# Create upload folder if it doesn't exist
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
 
-# Initialize the model
+# Initialize the model; it is loaded and warmed up by a background thread
+# (see load_model) so the process answers /api/health right away
 model = MultimodalStressDetector()
+model_ready = threading.Event()
+
+# Background analysis jobs
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+JOB_TTL = 600  # seconds a finished job's result is kept
+JOB_MAX_WAIT = 30  # longest ?wait= a request may block for
+JOB_MAX_PENDING = int(os.environ.get('JOB_MAX_PENDING', 64))  # queued + running jobs before 503
+JOB_RETRY_AFTER = 5  # seconds clients are asked to back off when the queue is full
+
+jobs = JobManager(max_workers=JOB_WORKERS, ttl=JOB_TTL, max_pending=JOB_MAX_PENDING)
+
+# Content-addressed cache of facial/voice feature vectors; set
+# FEATURE_CACHE_DIR to keep them on disk across restarts as well
+FEATURE_CACHE_MB = int(os.environ.get('FEATURE_CACHE_MB', 64))
+FEATURE_CACHE_DIR = os.environ.get('FEATURE_CACHE_DIR') or None
+FEATURE_CACHE_WAIT = 120  # seconds a duplicate request waits for the first one's extraction
+
+feature_cache = FeatureCache(max_bytes=FEATURE_CACHE_MB * 1024 * 1024, disk_dir=FEATURE_CACHE_DIR)
+
+# Streaming physiological sessions
+PHYS_SESSION_TTL = 3600  # seconds an idle session is kept
+PHYS_DEFAULT_SAMPLE_RATE = 256
+
+phys_sessions = SessionStore(PhysiologicalSession, idle_ttl=PHYS_SESSION_TTL)
+
+# Streaming webcam sessions (face tracking + smoothed score)
+WEBCAM_SESSION_TTL = 300  # seconds an idle session is kept
+
+webcam_sessions = SessionStore(functools.partial(WebcamStreamSession, model), idle_ttl=WEBCAM_SESSION_TTL)
+
+# Per-modality extraction worker processes; set all three to 0 to extract
+# sequentially in the request thread instead
+EXTRACTION_WORKERS = {
+    'facial_workers': int(os.environ.get('FACIAL_WORKERS', 1)),
+    'voice_workers': int(os.environ.get('VOICE_WORKERS', 1)),
+    'phys_workers': int(os.environ.get('PHYS_WORKERS', 1)),
+}
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+def get_extraction_pool():
+    """The shared ModalityExtractionPool, created on first use (None if disabled)"""
+    global _extraction_pool
+    if not any(EXTRACTION_WORKERS.values()):
+        return None
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ModalityExtractionPool(**EXTRACTION_WORKERS)
+    return _extraction_pool
 
-# Try to load pre-trained model if it exists
-MODEL_PATH = 'multimodal_stress_model.pkl'
-if os.path.exists(MODEL_PATH):
+# Try to load pre-trained model if it exists; the memory-mapped array
+# artifact is preferred over the pickle when both are present
+ARTIFACT_PATH = 'multimodal_stress_model.msd'
+MODEL_PATH = ARTIFACT_PATH if os.path.exists(ARTIFACT_PATH) else 'multimodal_stress_model.pkl'
+
+def warm_up_model():
+    """Run every extractor and a prediction once on synthetic input
+
+    Pays librosa filterbank/JIT setup, cascade loading and the extraction
+    worker start-up before the first real request does.
+    """
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    audio = rng.standard_normal(22050).astype(np.float32) * 0.1
+    eeg, gsr = rng.standard_normal(256), rng.standard_normal(256)
+    
+    facial_features = model.extract_facial_features(image)
+    # The random image has no face in it; a synthetic crop warms the feature path
+    model.extract_facial_features_from_roi(rng.integers(0, 256, (96, 96), dtype=np.uint8))
+    voice_features = model.extract_voice_features(audio)
+    phys_features = model.extract_physiological_features(eeg, gsr)
+    model.predict(facial_features=facial_features, voice_features=voice_features, phys_features=phys_features)
+    
+    pool = get_extraction_pool()
+    if pool is not None:
+        pool.extract(face_image=image, voice_audio=audio, eeg_data=eeg, gsr_data=gsr)
+
+def load_model():
+    """Load the trained model, then warm up; sets model_ready when done"""
+    if not os.path.exists(MODEL_PATH):
+        print("No pre-trained model found. Please train the model first using train_model.py")
+        return
     try:
+        start = time.perf_counter()
         model.load_model(MODEL_PATH)
         print("Pre-trained model loaded successfully!")
+        warm_up_model()
+        model_ready.set()
+        print(f"Model ready after {time.perf_counter() - start:.1f}s")
     except Exception as e:
         print(f"Could not load pre-trained model: {e}")
         print("Please train the model first using train_model.py")
 
+_loader_pid = None
+_loader_lock = threading.Lock()
+
+def start_model_loader():
+    """Start load_model on a background thread, once per server process
+
+    Every process loads its own model: a loader thread started before a fork
+    (e.g. gunicorn --preload importing the app in the master) would not exist
+    in the forked workers, which then would never become ready.
+    """
+    global _loader_pid
+    with _loader_lock:
+        if _loader_pid == os.getpid():
+            return
+        _loader_pid = os.getpid()
+    threading.Thread(target=load_model, name='model-loader', daemon=True).start()
+
+@app.before_request
+def ensure_model_loading():
+    """Under a WSGI server, the first request a worker gets (e.g. /api/ready) starts its load"""
+    start_model_loader()
+
+def requires_model(view):
+    """Answer 503 until the model is loaded and warm"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not model_ready.is_set():
+            return jsonify({
+                'status': 'error',
+                'message': 'Model is not ready yet, try again shortly'
+            }), 503
+        return view(*args, **kwargs)
+    return wrapper
+
 def allowed_file(filename, allowed_extensions):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return bool(filename) and '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (liveness; the model may still be loading)"""
     return jsonify({
         'status': 'healthy',
         'model_trained': model.is_trained
     })
 
-@app.route('/api/multimodal/analyze', methods=['POST'])
-def analyze_multimodal():
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """Feature cache hit/miss counters and memory use"""
+    return jsonify({'status': 'success', 'cache': feature_cache.stats()})
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 only once the model is loaded and warmed up"""
+    if model_ready.is_set():
+        return jsonify({'status': 'ready', 'model_trained': model.is_trained})
+    return jsonify({'status': 'loading', 'model_trained': model.is_trained}), 503
+
+def read_signal_inputs():
+    """Physiological signals of the current request, keyed eeg/gsr/ecg/rsp
+
+    Accepts an application/octet-stream float32 body (channels named by the
+    X-Channels header), .npy / raw float32 file parts, a `physiological`
+    .npz part, or the original comma-separated form fields. See signal_io.py.
     """
-    Multimodal stress analysis endpoint
-    Accepts: image file, audio file, EEG data, GSR data
+    if request.mimetype == 'application/octet-stream':
+        channels = signal_io.parse_channels(request.headers.get('X-Channels', 'eeg'))
+        return signal_io.decode_interleaved(request.get_data(), channels)
+    
+    signals = {}
+    if 'physiological' in request.files:
+        signals.update(signal_io.decode_npz(request.files['physiological'].read()))
+    for name in signal_io.SIGNAL_NAMES:
+        field = f'{name}_data'
+        if field in request.files:
+            part = request.files[field]
+            signals[name] = signal_io.decode_signal(part.read(), part.filename or '')
+        elif request.form.get(field):
+            signals[name] = signal_io.decode_text(request.form[field], field)
+    return signals
+
+def requested_sample_rate():
+    """Physiological sample rate from the X-Sample-Rate header or phys_sample_rate field"""
+    value = request.headers.get('X-Sample-Rate') or request.form.get('phys_sample_rate')
+    return float(value) if value else PHYS_DEFAULT_SAMPLE_RATE
+
+def read_multimodal_inputs():
+    """Pull the multimodal inputs out of the current request
+
+    Everything is read into memory here so the analysis itself can run
+    outside the request context (e.g. on a job worker). Raises ValueError
+    for malformed signal payloads.
     """
+    inputs = {'face_image': None, 'voice_audio': None}
+    
+    # Facial image if provided
+    if 'face_image' in request.files:
+        face_file = request.files['face_image']
+        if face_file and allowed_file(face_file.filename, ALLOWED_IMAGE_EXTENSIONS):
+            inputs['face_image'] = face_file.read()
+    
+    # Voice audio if provided
+    if 'voice_audio' in request.files:
+        audio_file = request.files['voice_audio']
+        if audio_file and allowed_file(audio_file.filename, ALLOWED_AUDIO_EXTENSIONS):
+            inputs['voice_audio'] = audio_file.read()
+    
+    # Physiological data if provided; raw ECG/respiration select the HRV/EDA
+    # extractor (training CSV schema)
+    signals = read_signal_inputs()
+    for name in signal_io.SIGNAL_NAMES:
+        signal = signals.get(name)
+        inputs[f'{name}_data'] = signal if signal is not None and len(signal) > 0 else None
+    inputs['phys_sample_rate'] = requested_sample_rate()
+    
+    return inputs
+
+def cache_lookup(modality, data):
+    """Feature cache lookup for an encoded face image or audio clip (None without input)"""
+    if data is None:
+        return None
+    return feature_cache.acquire(content_key(modality, model.feature_version(modality), data))
+
+def extract_cached(modality, data):
+    """extract_facial_features / extract_voice_features behind the feature cache"""
+    extract = model.extract_facial_features if modality == 'facial' else model.extract_voice_features
+    key = content_key(modality, model.feature_version(modality), data)
+    return feature_cache.get_or_compute(key, lambda: extract(data), timeout=FEATURE_CACHE_WAIT)
+
+def analyze_inputs(inputs):
+    """Extract features from the inputs and predict; returns (payload, http status)"""
     try:
         # Initialize feature holders
         facial_features = None
         voice_features = None
         phys_features = None
         
-        # Process facial image if provided
-        if 'face_image' in request.files:
-            face_file = request.files['face_image']
-            if face_file and allowed_file(face_file.filename, ALLOWED_IMAGE_EXTENSIONS):
-                filename = secure_filename(face_file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                face_file.save(filepath)
-                
-                # Extract facial features
-                facial_features = model.extract_facial_features(filepath)
-                
-                # Clean up
-                os.remove(filepath)
-        
-        # Process voice audio if provided
-        if 'voice_audio' in request.files:
-            audio_file = request.files['voice_audio']
-            if audio_file and allowed_file(audio_file.filename, ALLOWED_AUDIO_EXTENSIONS):
-                filename = secure_filename(audio_file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                audio_file.save(filepath)
+        # With ECG or respiration, GSR is read as EDA by the schema extractor
+        # (vectorized, well under a second) and EEG is not used
+        schema_phys = inputs.get('ecg_data') is not None or inputs.get('rsp_data') is not None
+        eeg_data = None if schema_phys else inputs['eeg_data']
+        gsr_data = None if schema_phys else inputs['gsr_data']
+        
+        # Only inputs this request owns in the feature cache are extracted here;
+        # cache hits and duplicates already being extracted are collected below
+        face_lookup = voice_lookup = None
+        owned = []
+        try:
+            face_lookup = cache_lookup('facial', inputs['face_image'])
+            voice_lookup = cache_lookup('voice', inputs['voice_audio'])
+            owned = [lookup for lookup in (face_lookup, voice_lookup) if lookup is not None and lookup.owner]
+            face_image = inputs['face_image'] if face_lookup in owned else None
+            voice_audio = inputs['voice_audio'] if voice_lookup in owned else None
+            
+            pool = get_extraction_pool()
+            if pool is not None:
+                # Modalities are extracted concurrently in the worker processes
+                facial_features, voice_features, phys_features = pool.extract(
+                    face_image=face_image,
+                    voice_audio=voice_audio,
+                    eeg_data=eeg_data,
+                    gsr_data=gsr_data
+                )
+            else:
+                if face_image is not None:
+                    facial_features = model.extract_facial_features(face_image)
                 
-                # Extract voice features
-                voice_features = model.extract_voice_features(filepath)
+                if voice_audio is not None:
+                    voice_features = model.extract_voice_features(voice_audio)
                 
-                # Clean up
-                os.remove(filepath)
+                if eeg_data is not None or gsr_data is not None:
+                    phys_features = model.extract_physiological_features(eeg_data, gsr_data)
+            
+            # Publish this request's own results before waiting on anyone else's
+            if face_lookup in owned:
+                facial_features = feature_cache.resolve(face_lookup, facial_features)
+                owned.remove(face_lookup)
+            if voice_lookup in owned:
+                voice_features = feature_cache.resolve(voice_lookup, voice_features)
+                owned.remove(voice_lookup)
+        except Exception as e:
+            # Unresolved lookups would leave every later duplicate waiting on them
+            for lookup in owned:
+                feature_cache.abandon(lookup, e)
+            raise
         
-        # Process physiological data if provided
-        eeg_data = request.form.get('eeg_data')
-        gsr_data = request.form.get('gsr_data')
+        if face_lookup is not None and not face_lookup.owner:
+            facial_features = face_lookup.result(timeout=FEATURE_CACHE_WAIT)
+        if voice_lookup is not None and not voice_lookup.owner:
+            voice_features = voice_lookup.result(timeout=FEATURE_CACHE_WAIT)
         
-        if eeg_data or gsr_data:
-            eeg_array = np.fromstring(eeg_data, sep=',') if eeg_data else None
-            gsr_array = np.fromstring(gsr_data, sep=',') if gsr_data else None
-            phys_features = model.extract_physiological_features(eeg_array, gsr_array)
+        if schema_phys:
+            phys_features = model.extract_physiological_schema_features(
+                ecg_data=inputs['ecg_data'],
+                gsr_data=inputs['gsr_data'],
+                rsp_data=inputs['rsp_data'],
+                sample_rate=inputs['phys_sample_rate']
+            )
         
-        # Check if at least one modality is provided
+        # Check if at least one modality is provided (and usable)
         if facial_features is None and voice_features is None and phys_features is None:
-            return jsonify({
+            unusable = [message for data, message in ((inputs['face_image'], NO_FACE_MESSAGE),
+                                                      (inputs['voice_audio'], UNREADABLE_AUDIO_MESSAGE))
+                        if data is not None]
+            return {
                 'status': 'error',
-                'message': 'Please provide at least one input (image, audio, or physiological data)'
-            }), 400
+                'message': ' '.join(unusable) or 'Please provide at least one input (image, audio, or physiological data)'
+            }, 400
         
         # Make prediction
         result = model.predict(
@@ -281,12 +520,126 @@ def analyze_multimodal():
         )
         
         if 'error' in result:
-            return jsonify({
+            return {
                 'status': 'error',
                 'message': result['error']
-            }), 400
+            }, 400
         
-        return jsonify(result)
+        return result, 200
+    
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': str(e)
+        }, 500
+
+def analyze_inputs_job(inputs):
+    """analyze_inputs for a background job: error payloads fail the job with their status"""
+    payload, status_code = analyze_inputs(inputs)
+    if status_code >= 400:
+        raise JobError(payload['message'], status_code)
+    return payload
+
+def analyze_video_job(path, sample_fps, max_seconds):
+    """analyze_video_file for a background job; unreadable videos fail with 400"""
+    try:
+        return analyze_video_file(path, sample_fps, max_seconds)
+    except ValueError as e:
+        raise JobError(str(e), 400)
+
+def queue_full_response():
+    """503 for a submission while the job queue is full"""
+    return jsonify({
+        'status': 'error',
+        'message': 'Too many analysis jobs are pending, try again shortly'
+    }), 503, {'Retry-After': str(JOB_RETRY_AFTER)}
+
+def job_response(job_id, timeout=None):
+    """JSON response describing a job, waiting up to `timeout` seconds for it
+
+    A failed job answers with the status code its analysis failed with.
+    """
+    job = jobs.get(job_id, timeout=timeout)
+    if job is None:
+        return jsonify({
+            'status': 'error',
+            'message': f'Unknown job id: {job_id}'
+        }), 404
+    
+    failed = job['status'] == FAILED
+    return jsonify({
+        'status': 'error' if failed else 'success',
+        'message': job['error'] if failed else None,
+        'job_id': job['id'],
+        'job_status': job['status'],
+        'status_code': job['status_code'],
+        'result': job['result'],
+        'error': job['error'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at']
+    }), job['status_code'] if failed else 200
+
+def requested_wait():
+    """The ?wait=<seconds> query parameter, capped at JOB_MAX_WAIT"""
+    try:
+        return min(max(float(request.args.get('wait', 0)), 0), JOB_MAX_WAIT)
+    except ValueError:
+        return 0
+
+@app.route('/api/multimodal/analyze', methods=['POST'])
+@requires_model
+def analyze_multimodal():
+    """
+    Multimodal stress analysis endpoint
+    Accepts: image file, audio file, EEG data, GSR data
+    """
+    try:
+        payload, status_code = analyze_inputs(read_multimodal_inputs())
+        return jsonify(payload), status_code
+    
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/jobs/multimodal', methods=['POST'])
+@requires_model
+def submit_multimodal_job():
+    """
+    Asynchronous multimodal analysis
+    Accepts the same inputs as /api/multimodal/analyze and returns a job id
+    immediately; pass ?wait=<seconds> to wait for the result instead.
+    """
+    try:
+        inputs = read_multimodal_inputs()
+        job_id = jobs.submit(analyze_inputs_job, inputs)
+        
+        wait = requested_wait()
+        if wait:
+            return job_response(job_id, timeout=wait)
+        
+        return jsonify({
+            'status': 'accepted',
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+    
+    except QueueFull:
+        return queue_full_response()
+    
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     
     except Exception as e:
         return jsonify({
@@ -294,7 +647,13 @@ def analyze_multimodal():
             'message': str(e)
         }), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status and, once finished, its result (?wait=<seconds> to long-poll)"""
+    return job_response(job_id, timeout=requested_wait())
+
 @app.route('/api/face/upload', methods=['POST'])
+@requires_model
 def analyze_face():
     """Facial stress analysis endpoint"""
     try:
@@ -318,18 +677,15 @@ def analyze_face():
                 'message': 'Invalid file type. Please upload an image (PNG, JPG, JPEG)'
             }), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
         # Extract features and predict
-        facial_features = model.extract_facial_features(filepath)
+        facial_features = extract_cached('facial', file.read())
+        if facial_features is None:
+            return jsonify({
+                'status': 'error',
+                'message': NO_FACE_MESSAGE
+            }), 400
         result = model.predict(facial_features=facial_features)
         
-        # Clean up
-        os.remove(filepath)
-        
         return jsonify(result)
     
     except Exception as e:
@@ -339,6 +695,7 @@ def analyze_face():
         }), 500
 
 @app.route('/api/voice/upload', methods=['POST'])
+@requires_model
 def analyze_voice():
     """Voice stress analysis endpoint"""
     try:
@@ -362,18 +719,15 @@ def analyze_voice():
                 'message': 'Invalid file type. Please upload an audio file (WAV, MP3)'
             }), 400
         
-        # Save file temporarily
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
         # Extract features and predict
-        voice_features = model.extract_voice_features(filepath)
+        voice_features = extract_cached('voice', file.read())
+        if voice_features is None:
+            return jsonify({
+                'status': 'error',
+                'message': UNREADABLE_AUDIO_MESSAGE
+            }), 400
         result = model.predict(voice_features=voice_features)
         
-        # Clean up
-        os.remove(filepath)
-        
         return jsonify(result)
     
     except Exception as e:
@@ -382,16 +736,99 @@ def analyze_voice():
             'message': str(e)
         }), 500
 
+def analyze_video_file(path, sample_fps, max_seconds):
+    """Run analyze_video on a temporary upload and remove it afterwards"""
+    try:
+        return analyze_video(model, path, sample_fps=sample_fps, max_seconds=max_seconds)
+    finally:
+        os.remove(path)
+
+@app.route('/api/video/upload', methods=['POST'])
+@requires_model
+def analyze_video_upload():
+    """
+    Video stress analysis endpoint
+    Accepts a video file; optional form fields sample_fps (default 2) and
+    max_seconds. Returns a per-second timeline plus an aggregate; pass
+    ?async=1 to get a job id instead (see /api/jobs/<job_id>).
+    """
+    # Must be set before the form is parsed (Flask >= 3.1)
+    request.max_content_length = MAX_VIDEO_CONTENT_LENGTH
+    try:
+        if 'file' not in request.files:
+            return jsonify({
+                'status': 'error',
+                'message': 'No file provided'
+            }), 400
+        
+        file = request.files['file']
+        
+        if not allowed_file(file.filename, ALLOWED_VIDEO_EXTENSIONS):
+            return jsonify({
+                'status': 'error',
+                'message': 'Invalid file type. Please upload a video (MP4, AVI, MOV, MKV, WEBM)'
+            }), 400
+        
+        sample_fps = float(request.form.get('sample_fps', 2.0))
+        max_seconds = request.form.get('max_seconds')
+        max_seconds = float(max_seconds) if max_seconds else None
+        if sample_fps <= 0:
+            raise ValueError('sample_fps must be positive')
+        
+        # OpenCV decodes from a file, so the upload is streamed to a temporary
+        # one; analyze_video_file removes it, here or on the job worker
+        suffix = '.' + file.filename.rsplit('.', 1)[1].lower()
+        tmp = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+        try:
+            with tmp:
+                file.save(tmp)
+            job_id = (jobs.submit(analyze_video_job, tmp.name, sample_fps, max_seconds)
+                      if request.args.get('async') else None)
+        except BaseException:
+            os.remove(tmp.name)
+            raise
+        
+        if job_id is not None:
+            return jsonify({
+                'status': 'accepted',
+                'job_id': job_id,
+                'status_url': f'/api/jobs/{job_id}'
+            }), 202
+        
+        return jsonify(analyze_video_file(tmp.name, sample_fps, max_seconds))
+    
+    except QueueFull:
+        return queue_full_response()
+    
+    except RequestEntityTooLarge:
+        return jsonify({
+            'status': 'error',
+            'message': f'Video exceeds the {MAX_VIDEO_CONTENT_LENGTH // (1024 * 1024)}MB upload limit'
+        }), 413
+    
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/voice/record', methods=['POST'])
 def record_voice():
     """Voice recording endpoint (simulated)"""
     # This is a placeholder - actual recording would be done client-side
     return jsonify({
         'status': 'error',
-        'message': 'Please use the upload feature instead of recording'
+        'message': 'Please use the upload feature, or stream live audio to /api/voice/stream on server.py'
     }), 501
 
 @app.route('/api/webcam/capture', methods=['POST'])
+@requires_model
 def capture_webcam():
     """Webcam capture endpoint"""
     try:
@@ -404,26 +841,125 @@ def capture_webcam():
                 'message': 'No image data provided'
             }), 400
         
-        import base64
-        from io import BytesIO
-        from PIL import Image
-        
-        # Decode base64 image
+        # Decode base64 image; the encoded bytes go straight to cv2.imdecode
         image_data = data['image'].split(',')[1] if ',' in data['image'] else data['image']
         image_bytes = base64.b64decode(image_data)
-        image = Image.open(BytesIO(image_bytes))
-        
-        # Save temporarily
-        temp_path = os.path.join(app.config['UPLOAD_FOLDER'], 'temp_webcam.jpg')
-        image.save(temp_path)
         
         # Extract features and predict
-        facial_features = model.extract_facial_features(temp_path)
+        facial_features = extract_cached('facial', image_bytes)
+        if facial_features is None:
+            return jsonify({
+                'status': 'error',
+                'message': NO_FACE_MESSAGE
+            }), 400
         result = model.predict(facial_features=facial_features)
         
-        # Clean up
-        os.remove(temp_path)
+        return jsonify(result)
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+def phys_session_not_found(session_id):
+    return jsonify({
+        'status': 'error',
+        'message': f'Unknown session id: {session_id}'
+    }), 404
+
+@app.route('/api/phys/sessions', methods=['POST'])
+def create_phys_session():
+    """
+    Start a streaming physiological session
+    Optional JSON: sample_rate (Hz), window_seconds (rolling window; omit for
+    the whole session), block_seconds (window granularity)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        window_seconds = data.get('window_seconds')
+        session_id, session = phys_sessions.create(
+            sample_rate=float(data.get('sample_rate', PHYS_DEFAULT_SAMPLE_RATE)),
+            window_seconds=float(window_seconds) if window_seconds else None,
+            block_seconds=float(data.get('block_seconds', 10))
+        )
+        return jsonify({
+            'status': 'success',
+            'session_id': session_id,
+            'session': session.describe(),
+            'samples_url': f'/api/phys/sessions/{session_id}/samples'
+        }), 201
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Invalid session parameters: {e}'
+        }), 400
+
+@app.route('/api/phys/sessions/<session_id>/samples', methods=['POST'])
+def push_phys_samples(session_id):
+    """Append sample chunks: JSON {"eeg": [...], "gsr": [...]} (either may be omitted)
+    or an application/octet-stream float32 body with an X-Channels header
+    """
+    session = phys_sessions.get(session_id)
+    if session is None:
+        return phys_session_not_found(session_id)
+    
+    try:
+        if request.mimetype == 'application/octet-stream':
+            # Binary float32 chunk, channels named by X-Channels (see signal_io.py)
+            channels = signal_io.parse_channels(request.headers.get('X-Channels', 'eeg'))
+            signals = signal_io.decode_interleaved(request.get_data(), channels)
+            eeg, gsr = signals.get('eeg'), signals.get('gsr')
+        else:
+            data = request.get_json(silent=True) or {}
+            eeg = np.asarray(data['eeg'], dtype=np.float64) if data.get('eeg') else None
+            gsr = np.asarray(data['gsr'], dtype=np.float64) if data.get('gsr') else None
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'eeg and gsr must be lists of numbers or float32 frames: {e}'
+        }), 400
+    
+    if eeg is None and gsr is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'Please provide eeg and/or gsr samples'
+        }), 400
+    
+    session.push(eeg=eeg, gsr=gsr)
+    return jsonify({
+        'status': 'success',
+        'session': session.describe()
+    })
+
+@app.route('/api/phys/sessions/<session_id>', methods=['GET'])
+@requires_model
+def get_phys_session(session_id):
+    """Current features and stress prediction of a session (no history re-scan)"""
+    session = phys_sessions.get(session_id)
+    if session is None:
+        return phys_session_not_found(session_id)
+    
+    try:
+        phys_features = session.features(model)
+        if phys_features is None:
+            return jsonify({
+                'status': 'error',
+                'message': 'No samples received yet',
+                'session': session.describe()
+            }), 409
+        
+        result = model.predict(phys_features=phys_features)
+        if 'error' in result:
+            return jsonify({
+                'status': 'error',
+                'message': result['error']
+            }), 400
         
+        result['session'] = session.describe()
+        if request.args.get('features'):
+            result['features'] = phys_features.tolist()
         return jsonify(result)
     
     except Exception as e:
@@ -432,10 +968,95 @@ def capture_webcam():
             'message': str(e)
         }), 500
 
+@app.route('/api/phys/sessions/<session_id>', methods=['DELETE'])
+def delete_phys_session(session_id):
+    """End a session and free its state"""
+    if not phys_sessions.delete(session_id):
+        return phys_session_not_found(session_id)
+    return jsonify({'status': 'success', 'session_id': session_id})
+
+def webcam_session_not_found(session_id):
+    return jsonify({
+        'status': 'error',
+        'message': f'Unknown webcam session id: {session_id}'
+    }), 404
+
+@app.route('/api/webcam/sessions', methods=['POST'])
+def create_webcam_session():
+    """
+    Start a continuous webcam session
+    Optional JSON: smoothing_seconds, duplicate_distance (dHash bits),
+    redetect_every (tracked frames between forced face detections)
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        session_id, _ = webcam_sessions.create(
+            smoothing_seconds=float(data.get('smoothing_seconds', 2.0)),
+            duplicate_distance=int(data.get('duplicate_distance', 4)),
+            redetect_every=int(data.get('redetect_every', 30))
+        )
+        return jsonify({
+            'status': 'success',
+            'session_id': session_id,
+            'frames_url': f'/api/webcam/sessions/{session_id}/frames'
+        }), 201
+    
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Invalid session parameters: {e}'
+        }), 400
+
+@app.route('/api/webcam/sessions/<session_id>/frames', methods=['POST'])
+@requires_model
+def push_webcam_frame(session_id):
+    """
+    Send one frame: a raw image/jpeg or image/png body, or JSON {"image": <base64>}
+    Returns the smoothed stress estimate so far
+    """
+    session = webcam_sessions.get(session_id)
+    if session is None:
+        return webcam_session_not_found(session_id)
+    
+    try:
+        if request.mimetype in ('image/jpeg', 'image/png'):
+            image_bytes = request.get_data()
+        else:
+            data = request.get_json(silent=True) or {}
+            if 'image' not in data:
+                return jsonify({
+                    'status': 'error',
+                    'message': 'No image data provided'
+                }), 400
+            image_data = data['image'].split(',')[1] if ',' in data['image'] else data['image']
+            image_bytes = base64.b64decode(image_data)
+        
+        return jsonify(session.push_frame(image_bytes))
+    
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
+@app.route('/api/webcam/sessions/<session_id>', methods=['DELETE'])
+def delete_webcam_session(session_id):
+    """End a webcam session"""
+    if not webcam_sessions.delete(session_id):
+        return webcam_session_not_found(session_id)
+    return jsonify({'status': 'success', 'session_id': session_id})
+
 if __name__ == '__main__':
     print("Starting Multimodal Stress Detection API...")
-    print(f"Model trained: {model.is_trained}")
-    if not model.is_trained:
+    print("Model loads in the background; poll /api/ready for readiness")
+    start_model_loader()
+    if not os.path.exists(MODEL_PATH):
         print("\n⚠️  WARNING: Model not trained!")
         print("Please run train_model.py first to train the model.\n")
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
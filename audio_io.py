@@ -0,0 +1,30 @@
+"""
+Decoding of uploaded (encoded) audio
+
+Shared by model.py and server.py so both handle the same formats the same way.
+"""
+
+import io
+import os
+import tempfile
+
+
+def load_audio_bytes(data, sr=None, duration=None, suffix=''):
+    """Decode encoded audio bytes with librosa; returns (y, sr)
+
+    libsndfile decodes WAV/OGG/FLAC (and MP3 on recent versions) from a
+    buffer; other formats such as m4a need audioread, which only reads
+    paths, so those go through a private temporary file. `suffix` (e.g.
+    '.mp3') helps the decoder pick the format. sr=None keeps the native rate.
+    """
+    import librosa
+    try:
+        return librosa.load(io.BytesIO(data), sr=sr, duration=duration)
+    except Exception:
+        # delete=False so the decoder can reopen the file on Windows too
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+            tmp.write(data)
+        try:
+            return librosa.load(tmp.name, sr=sr, duration=duration)
+        finally:
+            os.remove(tmp.name)
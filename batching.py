@@ -0,0 +1,83 @@
+"""
+Dynamic micro-batching for model inference
+
+Concurrent callers submit single samples; a scheduler thread collects them
+until `max_batch_size` items are queued or the oldest has waited
+`max_wait_ms`, runs one forward pass over the stacked batch, and hands each
+caller its own row. Keras `predict` has a large fixed per-call cost, so a
+batch of 16 costs little more than a batch of 1 on CPU.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+
+
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=10, name='batcher'):
+        """
+        predict_fn: callable taking an (N, ...) array and returning N rows.
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, sample):
+        """Queue one sample (without a batch axis); returns a Future for its prediction row"""
+        future = Future()
+        self._queue.put((np.asarray(sample), future))
+        return future
+
+    def predict(self, sample, timeout=None):
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(sample).result(timeout=timeout)
+
+    def _collect(self):
+        """Block for the first item, then gather more until the batch is full or the deadline passes"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            # Callers may have cancelled while waiting in the queue
+            batch = [(sample, future) for sample, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                outputs = self.predict_fn(np.stack([sample for sample, _ in batch]))
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+
+class BatchedModel:
+    """Keras-style `predict` front end that routes each row through a MicroBatcher
+
+    Lets existing code that calls `model.predict(x)` share batched forward
+    passes without changes.
+    """
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    def predict(self, x, **kwargs):
+        futures = [self.batcher.submit(row) for row in np.asarray(x)]
+        return np.stack([future.result() for future in futures])
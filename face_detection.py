@@ -0,0 +1,100 @@
+"""
+Face detection shared by the facial feature extractors
+
+The Haar cascade XML is parsed once per worker thread (cv2.CascadeClassifier
+is not safe to share between threads) and detection runs on a downscaled copy
+of the image. Boxes are mapped back to full resolution so feature extraction
+still sees the original pixels.
+"""
+
+import threading
+import numpy as np
+
+# Bundled with OpenCV (cv2.data.haarcascades); cv2 itself is imported on first use
+CASCADE_FILE = 'haarcascade_frontalface_default.xml'
+
+
+class FaceDetector:
+    def __init__(self, detection_size=480, min_face_size=None, max_face_size=None,
+                 scale_factor=1.3, min_neighbors=5, cascade_path=None):
+        """
+        detection_size: longest side (px) of the image the cascade runs on;
+            larger images are downscaled to it, smaller ones are left as is.
+        min_face_size / max_face_size: (w, h) bounds in full-resolution pixels.
+        cascade_path: cascade XML (default: OpenCV's frontal face cascade).
+        """
+        self.detection_size = detection_size
+        self.min_face_size = min_face_size
+        self.max_face_size = max_face_size
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.cascade_path = cascade_path
+        self._local = threading.local()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_local']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _cascade(self):
+        """Return this thread's classifier, loading the XML on first use"""
+        cascade = getattr(self._local, 'cascade', None)
+        if cascade is None:
+            import cv2
+            path = self.cascade_path or cv2.data.haarcascades + CASCADE_FILE
+            cascade = cv2.CascadeClassifier(path)
+            if cascade.empty():
+                raise IOError(f"Could not load face cascade from {path}")
+            self._local.cascade = cascade
+        return cascade
+
+    def _scaled_size(self, size, scale):
+        if size is None:
+            return None
+        return (max(1, int(size[0] * scale)), max(1, int(size[1] * scale)))
+
+    def detect(self, gray):
+        """Detect faces in a grayscale image
+
+        Returns an (N, 4) int array of (x, y, w, h) boxes in the coordinates
+        of `gray`.
+        """
+        import cv2
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.detection_size / float(max(height, width)))
+        if scale < 1.0:
+            small = cv2.resize(gray, (max(1, int(round(width * scale))), max(1, int(round(height * scale)))),
+                               interpolation=cv2.INTER_AREA)
+        else:
+            small = gray
+
+        kwargs = {}
+        min_size = self._scaled_size(self.min_face_size, scale)
+        max_size = self._scaled_size(self.max_face_size, scale)
+        if min_size is not None:
+            kwargs['minSize'] = min_size
+        if max_size is not None:
+            kwargs['maxSize'] = max_size
+
+        faces = self._cascade().detectMultiScale(small, self.scale_factor, self.min_neighbors, **kwargs)
+        if len(faces) == 0:
+            return np.empty((0, 4), dtype=int)
+
+        # Map boxes back to full resolution and clip to the image
+        boxes = np.round(np.asarray(faces, dtype=np.float64) / scale).astype(int)
+        boxes[:, 0] = np.clip(boxes[:, 0], 0, width - 1)
+        boxes[:, 1] = np.clip(boxes[:, 1], 0, height - 1)
+        boxes[:, 2] = np.minimum(boxes[:, 2], width - boxes[:, 0])
+        boxes[:, 3] = np.minimum(boxes[:, 3], height - boxes[:, 1])
+        return boxes
+
+    def largest_face(self, gray):
+        """Return the largest (x, y, w, h) box, or None if no face is found"""
+        boxes = self.detect(gray)
+        if len(boxes) == 0:
+            return None
+        return tuple(int(v) for v in boxes[np.argmax(boxes[:, 2] * boxes[:, 3])])
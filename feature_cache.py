@@ -0,0 +1,175 @@
+"""
+Content-addressed cache for extracted feature vectors
+
+Clients often resend the same image or audio (retries, re-analysis with
+another modality added). Features are cached under a hash of the input bytes
+plus the extractor's version string, so a changed extractor never serves
+stale vectors.
+
+    memory tier   LRU bounded by a byte budget (sum of array nbytes)
+    disk tier     optional directory of .npy files, consulted on memory misses
+    single-flight concurrent requests for the same key wait for the first
+                  one's result instead of extracting again
+
+Callers either use `get_or_compute(key, fn)`, or `acquire(key)` when the
+computation is batched elsewhere (e.g. the extraction pool): the owner of a
+pending lookup must `resolve` or `abandon` it.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
+
+
+def content_key(namespace, version, data):
+    """Cache key for `data` (bytes-like) under an extractor name and version"""
+    digest = hashlib.blake2b(memoryview(data), digest_size=20).hexdigest()
+    # Keys double as file names in the disk tier
+    version = re.sub(r'[^\w.]', '', str(version))
+    return f'{namespace}-{version}-{digest}'
+
+
+class Lookup:
+    """Result of FeatureCache.acquire
+
+    hit:    `value` holds the cached features
+    owner:  this caller computes the value and must resolve/abandon the key
+    waiter: another caller is computing it; `result()` blocks for it
+    """
+
+    def __init__(self, key, value=None, future=None, owner=False):
+        self.key = key
+        self.value = value
+        self.future = future
+        self.owner = owner
+
+    @property
+    def hit(self):
+        return self.future is None
+
+    def result(self, timeout=None):
+        return self.value if self.future is None else self.future.result(timeout=timeout)
+
+
+class FeatureCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + '.npy')
+
+    def _load_disk(self, key):
+        if not self.disk_dir:
+            return None
+        try:
+            return np.load(self._disk_path(key), allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+
+    def _store_disk(self, key, value):
+        if not self.disk_dir:
+            return
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, value, allow_pickle=False)
+            os.replace(tmp_path, self._disk_path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _insert(self, key, value):
+        """Add to the memory tier, evicting least recently used entries; caller holds the lock"""
+        if value.nbytes > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key).nbytes
+        self._entries[key] = value
+        self._bytes += value.nbytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+            self.counters['evictions'] += 1
+
+    def acquire(self, key):
+        """Look `key` up; on a miss the first caller becomes the owner (see Lookup)"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.counters['hits'] += 1
+                return Lookup(key, value=value)
+            future = self._pending.get(key)
+            if future is not None:
+                self.counters['coalesced'] += 1
+                return Lookup(key, future=future)
+            future = self._pending[key] = Future()
+
+        value = self._load_disk(key)
+        if value is not None:
+            with self._lock:
+                self.counters['disk_hits'] += 1
+                self._insert(key, value)
+                del self._pending[key]
+            future.set_result(value)
+            return Lookup(key, value=value)
+
+        with self._lock:
+            self.counters['misses'] += 1
+        return Lookup(key, future=future, owner=True)
+
+    def resolve(self, lookup, value):
+        """Publish an owner's result; None results are handed to waiters but not cached"""
+        if value is not None:
+            value = np.array(value)
+            value.setflags(write=False)
+        with self._lock:
+            if value is not None:
+                self._insert(lookup.key, value)
+            future = self._pending.pop(lookup.key, None)
+        if value is not None:
+            self._store_disk(lookup.key, value)
+        if future is not None:
+            future.set_result(value)
+        return value
+
+    def abandon(self, lookup, error):
+        """Fail an owner's lookup; waiters see `error` and the next request retries"""
+        with self._lock:
+            future = self._pending.pop(lookup.key, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def get_or_compute(self, key, compute, timeout=None):
+        lookup = self.acquire(key)
+        if not lookup.owner:
+            return lookup.result(timeout=timeout)
+        try:
+            value = compute()
+        except Exception as e:
+            self.abandon(lookup, e)
+            raise
+        return self.resolve(lookup, value)
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self.counters[name] for name in ('hits', 'disk_hits', 'misses', 'coalesced'))
+            return dict(self.counters,
+                        entries=len(self._entries),
+                        bytes=self._bytes,
+                        max_bytes=self.max_bytes,
+                        hit_rate=(lookups - self.counters['misses']) / lookups if lookups else 0.0)
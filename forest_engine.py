@@ -0,0 +1,178 @@
+"""
+Vectorized inference engine for the modality RandomForests
+
+A CompiledForest evaluates every tree of a forest at once over flat node
+arrays: the traversal state is an (n_samples, n_trees) matrix of node indices
+advanced one level per step, so the Python overhead is one NumPy step per
+tree level instead of sklearn's per-call validation and per-tree dispatch.
+
+The StandardScaler in front of each forest is folded into the split
+thresholds at compile time (x_scaled <= t  <=>  x <= t * scale + mean, since
+scale > 0), so raw feature vectors go straight in.
+
+Run `python forest_engine.py [multimodal_stress_model.pkl]` for a parity and
+latency comparison against sklearn for batch sizes 1 to 10k.
+"""
+
+import sys
+import time
+import numpy as np
+
+import model_artifact
+
+
+# Node arrays of a compiled forest, as stored in the model artifact
+ENGINE_ARRAYS = ('roots', 'feature', 'threshold', 'children_left', 'children_right', 'value')
+
+
+class CompiledForest:
+    def __init__(self, roots, feature, threshold, children_left, children_right, value, classes, max_depth,
+                 n_features_in=None):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        # Pre-divided by the number of trees so a sum over trees is the forest mean
+        self.value = value
+        self.classes_ = classes
+        self.max_depth = max_depth
+        # Width of the (unscaled) feature vectors the engine was compiled for
+        self.n_features_in_ = n_features_in
+
+    @classmethod
+    def compile(cls, forest, scaler=None):
+        """Build an engine from a fitted RandomForest or an ArrayForest
+
+        If `scaler` is given its mean/scale are folded into the thresholds and
+        the engine expects unscaled features.
+        """
+        if isinstance(forest, model_artifact.ArrayForest):
+            arrays = {
+                'tree_offsets': forest.tree_offsets, 'feature': forest.feature,
+                'threshold': forest.threshold, 'children_left': forest.children_left,
+                'children_right': forest.children_right, 'value': forest.value,
+                'classes': forest.classes_,
+            }
+        else:
+            arrays = model_artifact.forest_to_arrays(forest)
+
+        # Node indices fit in int32, the dtype the artifact stores them in
+        feature = np.array(arrays['feature'], dtype=np.int32)
+        threshold = np.array(arrays['threshold'], dtype=np.float64)
+        left = np.array(arrays['children_left'], dtype=np.int32)
+        right = np.array(arrays['children_right'], dtype=np.int32)
+        roots = np.asarray(arrays['tree_offsets'][:-1], dtype=np.int32)
+        n_trees = len(roots)
+
+        if scaler is not None:
+            n_features_in = len(scaler.mean_)
+        else:
+            n_features_in = getattr(forest, 'n_features_in_', None)
+
+        # sklearn compares float32 features against the float64 threshold
+        leaf = feature < 0
+        if scaler is not None:
+            mean = np.asarray(scaler.mean_, dtype=np.float64)
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+            internal = ~leaf
+            threshold[internal] = threshold[internal] * scale[feature[internal]] + mean[feature[internal]]
+
+        # Leaves point to themselves, so extra steps past a leaf are no-ops
+        nodes = np.arange(len(feature), dtype=np.int32)
+        feature[leaf] = 0
+        threshold[leaf] = np.inf
+        left[leaf] = nodes[leaf]
+        right[leaf] = nodes[leaf]
+
+        return cls(roots, feature, threshold, left, right,
+                   np.asarray(arrays['value'], dtype=np.float64) / n_trees,
+                   np.asarray(arrays['classes']), cls._depth(roots, left, right, leaf), n_features_in)
+
+    def arrays(self):
+        """The compiled node arrays by name (see ENGINE_ARRAYS)"""
+        return {name: getattr(self, name) for name in ENGINE_ARRAYS}
+
+    @staticmethod
+    def _depth(roots, left, right, leaf):
+        """Deepest root-to-leaf path over all trees, walked level by level"""
+        depth = 0
+        frontier = roots[~leaf[roots]]
+        while len(frontier):
+            depth += 1
+            children = np.concatenate([left[frontier], right[frontier]])
+            frontier = children[~leaf[children]]
+        return depth
+
+    def _check_input(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2:
+            raise ValueError(f"Expected a 2-D feature matrix, got shape {X.shape}")
+        if self.n_features_in_ is not None and X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features_in_}")
+        return X
+
+    def apply(self, X):
+        """Leaf index reached in every tree, shape (n_samples, n_trees)"""
+        X = self._check_input(X)
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.children_left[node], self.children_right[node])
+        return node
+
+    def predict_proba(self, X):
+        # apply() rejects inputs of the wrong width
+        return self.value[self.apply(X)].sum(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def benchmark(forest, scaler, n_features, batch_sizes=(1, 10, 100, 1000, 10000), repeats=20, seed=0):
+    """Time sklearn (scaler + predict_proba) against the compiled engine
+
+    Returns one dict per batch size with median latencies in milliseconds and
+    the largest absolute probability difference.
+    """
+    engine = CompiledForest.compile(forest, scaler)
+    rng = np.random.default_rng(seed)
+    mean = np.asarray(scaler.mean_)
+    scale = np.asarray(scaler.scale_)
+    report = []
+    for batch_size in batch_sizes:
+        X = mean + scale * rng.standard_normal((batch_size, n_features))
+        runs = max(1, repeats if batch_size <= 1000 else repeats // 4)
+
+        timings = {}
+        for label, fn in (('sklearn', lambda: forest.predict_proba(scaler.transform(X))),
+                          ('engine', lambda: engine.predict_proba(X))):
+            samples = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                fn()
+                samples.append(time.perf_counter() - start)
+            timings[label] = np.median(samples) * 1000
+
+        diff = np.max(np.abs(forest.predict_proba(scaler.transform(X)) - engine.predict_proba(X)))
+        report.append({'batch_size': batch_size, 'sklearn_ms': timings['sklearn'],
+                       'engine_ms': timings['engine'], 'max_abs_diff': float(diff)})
+    return report
+
+
+if __name__ == '__main__':
+    from model import MultimodalStressDetector
+
+    path = sys.argv[1] if len(sys.argv) > 1 else 'multimodal_stress_model.pkl'
+    detector = MultimodalStressDetector()
+    detector.load_model(path)
+
+    for name, clf, scaler in detector._modalities():
+        if clf is None:
+            continue
+        print(f"\n{name} ({len(scaler.mean_)} features)")
+        print(f"{'batch':>8} {'sklearn ms':>12} {'engine ms':>12} {'speedup':>9} {'max diff':>10}")
+        for row in benchmark(clf, scaler, len(scaler.mean_)):
+            print(f"{row['batch_size']:>8} {row['sklearn_ms']:>12.3f} {row['engine_ms']:>12.3f} "
+                  f"{row['sklearn_ms'] / row['engine_ms']:>8.1f}x {row['max_abs_diff']:>10.2e}")
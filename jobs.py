@@ -0,0 +1,115 @@
+"""
+Background job queue for long-running analysis requests
+
+Requests submit work to a local thread pool and get a job id back right away;
+clients then poll (or wait with a timeout) for the result. Finished jobs are
+kept for `ttl` seconds so a client can still collect them after a slow poll.
+At most `max_pending` jobs may be queued or running at once (each one holds
+its inputs in memory); beyond that, submit raises QueueFull.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class JobError(Exception):
+    """Raised by a job to fail with a specific HTTP status (other exceptions map to 500)"""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class QueueFull(Exception):
+    """Raised by JobManager.submit when `max_pending` jobs are already queued or running"""
+
+
+class JobManager:
+    def __init__(self, max_workers=4, ttl=600, max_pending=64):
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-job')
+        self._jobs = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) and return the new job id (raises QueueFull)"""
+        self._expire()
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': QUEUED,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+            'status_code': None,
+        }
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs are already pending")
+            self._pending += 1
+            self._jobs[job_id] = job
+        try:
+            job['future'] = self._executor.submit(self._run, job, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._pending -= 1
+                del self._jobs[job_id]
+            raise
+        return job_id
+
+    def _run(self, job, fn, args, kwargs):
+        job['status'] = RUNNING
+        job['started_at'] = time.time()
+        try:
+            job['result'] = fn(*args, **kwargs)
+            job['status_code'] = 200
+            job['status'] = DONE
+        except JobError as e:
+            job['error'] = str(e)
+            job['status_code'] = e.status_code
+            job['status'] = FAILED
+        except Exception as e:
+            job['error'] = str(e)
+            job['status_code'] = 500
+            job['status'] = FAILED
+        finally:
+            job['finished_at'] = time.time()
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, job_id, timeout=None):
+        """Return a snapshot of the job, optionally waiting up to `timeout` seconds
+
+        Returns None for unknown (or expired) job ids.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        future = job.get('future')
+        if timeout and future is not None:
+            wait([future], timeout=timeout)
+        return {key: value for key, value in job.items() if key != 'future'}
+
+    def _expire(self):
+        """Drop finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] is not None and job['finished_at'] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def shutdown(self, wait_for_jobs=True):
+        self._executor.shutdown(wait=wait_for_jobs)
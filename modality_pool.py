@@ -0,0 +1,256 @@
+"""
+Parallel per-modality feature extraction in warm worker processes
+
+Each modality gets its own process pool, so facial, voice and physiological
+extraction for one request run concurrently and outside the web process's
+GIL; request latency becomes the slowest modality instead of the sum.
+
+Inputs travel through shared memory rather than being pickled: images are
+decoded once in the caller (cv2.imdecode is cheap) and the pixel array is
+shared, physiological signals are shared as float arrays, and audio is shared
+as its encoded bytes because decoding/resampling is part of the voice work.
+
+Workers import OpenCV/librosa and run one warm-up extraction on synthetic
+input when they start, so the first real request doesn't pay that cost. A
+worker that dies (e.g. out of memory or a native fault in a decoder) breaks
+only its modality's pool: that pool is replaced and the affected request
+extracts the modality in-process instead.
+
+Run `python modality_pool.py [image] [audio]` to compare sequential and
+parallel latency.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+import numpy as np
+
+# Seconds a request waits for a worker before giving up
+DEFAULT_TIMEOUT = 60
+
+# Per-process detector, created by the pool initializer
+_detector = None
+
+
+def _share(array):
+    """Copy `array` into a new shared memory block; returns (block, descriptor)"""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, {'name': block.name, 'shape': array.shape, 'dtype': array.dtype.str}
+
+
+def _attach(name):
+    """Attach to a block owned by the parent; the creating process tracks and unlinks it
+
+    Python >= 3.13 attaches untracked. Older versions register the name with
+    the resource tracker again; pool workers inherit the parent's tracker,
+    where the name is already registered, so that is harmless and the parent's
+    unlink() clears it. (Unregistering here would drop the parent's entry.)
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _warm_up(modality):
+    """Run one extraction on synthetic input to load filterbanks, cascades, JIT caches"""
+    rng = np.random.default_rng(0)
+    if modality == 'facial':
+        _detector.extract_facial_features(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8))
+        # No face in random noise; a synthetic crop warms the feature path
+        _detector.extract_facial_features_from_roi(rng.integers(0, 256, (96, 96), dtype=np.uint8))
+    elif modality == 'voice':
+        _detector.extract_voice_features(rng.standard_normal(22050).astype(np.float32) * 0.1)
+    else:
+        _detector.extract_physiological_features(rng.standard_normal(256), rng.standard_normal(256))
+
+
+def _init_worker(modality):
+    global _detector
+    from model import MultimodalStressDetector
+    _detector = MultimodalStressDetector()
+    _warm_up(modality)
+
+
+def _extract_shared(modality, descriptors, blocks, encoded):
+    arrays = [None if d is None else np.ndarray(d['shape'], dtype=d['dtype'], buffer=b.buf)
+              for d, b in zip(descriptors, blocks)]
+    if modality == 'facial':
+        features = _detector.extract_facial_features(arrays[0])
+    elif modality == 'voice':
+        features = _detector.extract_voice_features(arrays[0].tobytes() if encoded else arrays[0])
+    else:
+        features = _detector.extract_physiological_features(*arrays)
+    # Results must not alias the shared buffers, which are released by the caller
+    return None if features is None else np.array(features)
+
+
+def _extract(modality, descriptors, encoded):
+    """Worker entry point: map the shared inputs and run one extractor"""
+    blocks = [None if d is None else _attach(d['name']) for d in descriptors]
+    try:
+        return _extract_shared(modality, descriptors, blocks, encoded)
+    finally:
+        for block in blocks:
+            if block is None:
+                continue
+            try:
+                block.close()
+            except BufferError:
+                # A traceback still references a view; the mapping goes with the process
+                pass
+
+
+class ModalityExtractionPool:
+    def __init__(self, facial_workers=1, voice_workers=1, phys_workers=1, start_method='spawn'):
+        """One warm process pool per modality; a size of 0 runs that modality in-process"""
+        self._context = get_context(start_method)
+        self._sizes = {'facial': facial_workers, 'voice': voice_workers, 'physiological': phys_workers}
+        self._pools = {modality: self._new_pool(modality)
+                       for modality, size in self._sizes.items() if size > 0}
+        self._pools_lock = threading.Lock()
+        self._local_detector = None
+
+    def _new_pool(self, modality):
+        return ProcessPoolExecutor(max_workers=self._sizes[modality], mp_context=self._context,
+                                   initializer=_init_worker, initargs=(modality,))
+
+    def _replace_broken(self, modality, pool):
+        """Swap in a fresh pool for `modality` unless another request already did"""
+        with self._pools_lock:
+            if self._pools.get(modality) is pool:
+                self._pools[modality] = self._new_pool(modality)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run_local(self, modality, inputs, encoded):
+        if self._local_detector is None:
+            from model import MultimodalStressDetector
+            self._local_detector = MultimodalStressDetector()
+        if modality == 'facial':
+            return self._local_detector.extract_facial_features(inputs[0])
+        if modality == 'voice':
+            return self._local_detector.extract_voice_features(inputs[0].tobytes() if encoded else inputs[0])
+        return self._local_detector.extract_physiological_features(*inputs)
+
+    def extract(self, face_image=None, voice_audio=None, eeg_data=None, gsr_data=None,
+                timeout=DEFAULT_TIMEOUT):
+        """Extract all provided modalities concurrently
+
+        face_image: encoded bytes or a decoded BGR array.
+        voice_audio: encoded bytes or a waveform array at 22050 Hz.
+        Returns (facial_features, voice_features, phys_features), None for
+        modalities without input. Raises TimeoutError when a worker takes
+        longer than `timeout` seconds.
+        """
+        import cv2
+
+        work = {}
+        if face_image is not None:
+            if isinstance(face_image, (bytes, bytearray, memoryview)):
+                face_image = cv2.imdecode(np.frombuffer(face_image, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if face_image is not None:
+                work['facial'] = ([face_image], False)
+        if voice_audio is not None:
+            encoded = isinstance(voice_audio, (bytes, bytearray, memoryview))
+            work['voice'] = ([np.frombuffer(voice_audio, dtype=np.uint8) if encoded
+                              else np.asarray(voice_audio, dtype=np.float32)], encoded)
+        if eeg_data is not None or gsr_data is not None:
+            work['physiological'] = ([None if eeg_data is None else np.asarray(eeg_data, dtype=np.float64),
+                                      None if gsr_data is None else np.asarray(gsr_data, dtype=np.float64)], False)
+
+        blocks = []
+        pools = {}
+        futures = {}
+        results = {}
+        try:
+            for modality, (inputs, encoded) in work.items():
+                pool = pools[modality] = self._pools.get(modality)
+                if pool is None:
+                    continue
+                descriptors = []
+                for array in inputs:
+                    if array is None:
+                        descriptors.append(None)
+                        continue
+                    block, descriptor = _share(array)
+                    blocks.append(block)
+                    descriptors.append(descriptor)
+                try:
+                    futures[modality] = pool.submit(_extract, modality, descriptors, encoded)
+                except BrokenProcessPool:
+                    self._replace_broken(modality, pool)
+
+            # Modalities without a (working) pool run here while the others are in flight
+            for modality, (inputs, encoded) in work.items():
+                if modality not in futures:
+                    results[modality] = self._run_local(modality, inputs, encoded)
+
+            for modality, future in futures.items():
+                try:
+                    results[modality] = future.result(timeout=timeout)
+                except BrokenProcessPool:
+                    self._replace_broken(modality, pools[modality])
+                    inputs, encoded = work[modality]
+                    results[modality] = self._run_local(modality, inputs, encoded)
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        return results.get('facial'), results.get('voice'), results.get('physiological')
+
+    def shutdown(self, wait=True):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+
+
+def benchmark(face_image, voice_audio, eeg_data, gsr_data, repeats=5):
+    """Median latency (ms) of sequential in-process vs parallel pooled extraction"""
+    from model import MultimodalStressDetector
+
+    detector = MultimodalStressDetector()
+    sequential = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        detector.extract_facial_features(face_image)
+        detector.extract_voice_features(voice_audio)
+        detector.extract_physiological_features(eeg_data, gsr_data)
+        sequential.append(time.perf_counter() - start)
+
+    pool = ModalityExtractionPool()
+    try:
+        pool.extract(face_image, voice_audio, eeg_data, gsr_data)  # workers start and warm up
+        parallel = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            pool.extract(face_image, voice_audio, eeg_data, gsr_data)
+            parallel.append(time.perf_counter() - start)
+    finally:
+        pool.shutdown()
+
+    return {'sequential_ms': np.median(sequential) * 1000, 'parallel_ms': np.median(parallel) * 1000}
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    if len(sys.argv) > 2:
+        with open(sys.argv[1], 'rb') as f:
+            image = f.read()
+        with open(sys.argv[2], 'rb') as f:
+            audio = f.read()
+    else:
+        import cv2
+        image = cv2.imencode('.jpg', rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8))[1].tobytes()
+        audio = (rng.standard_normal(22050 * 30) * 0.1).astype(np.float32)
+    eeg = rng.standard_normal(256 * 60)
+    gsr = rng.standard_normal(256 * 60)
+
+    report = benchmark(image, audio, eeg, gsr)
+    print(f"Sequential: {report['sequential_ms']:.0f} ms")
+    print(f"Parallel:   {report['parallel_ms']:.0f} ms "
+          f"({report['sequential_ms'] / report['parallel_ms']:.1f}x)")
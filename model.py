@@ -2,15 +2,232 @@
 Fixed model.py with correct feature dimensions matching training data
 """
 
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import cv2
-import librosa
 import pickle
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler
+from audio_io import load_audio_bytes
+from face_detection import FaceDetector
+from voice_features import VoiceFeatureEngine
+import model_artifact
+from forest_engine import CompiledForest
+from resource_usage import peak_rss_mb
+
+# OpenCV, librosa, scikit-learn and SciPy (phys_features) are imported inside
+# the functions that need them, so importing this module (app.py at startup)
+# stays cheap; the background model load and warm-up pay for them instead
+
+VOICE_SAMPLE_RATE = 22050
+VOICE_DURATION = 30
+
+# Decision-level fusion rules accepted by predict / predict_batch
+FUSION_RULES = ('average', 'max', 'product')
+
+# Bump when an extractor's output changes so cached vectors are not reused
+# (2: failures return None instead of random fallback vectors)
+FEATURE_VERSIONS = {'facial': 2, 'voice': 2}
+
+
+def _read_image(source):
+    """Decode an image from a path, encoded bytes/buffer, file object or array"""
+    import cv2
+    if isinstance(source, (str, os.PathLike)):
+        return cv2.imread(os.fspath(source))
+    if hasattr(source, 'read'):
+        source = source.read()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = np.frombuffer(source, dtype=np.uint8)
+    if isinstance(source, np.ndarray):
+        if source.ndim == 1:
+            # Encoded image bytes (JPEG/PNG) held in memory
+            return cv2.imdecode(source, cv2.IMREAD_COLOR)
+        if source.ndim == 2:
+            return cv2.cvtColor(source, cv2.COLOR_GRAY2BGR)
+        return source
+    return None
+
+
+def _read_audio(source, duration=VOICE_DURATION):
+    """Load up to `duration` seconds of mono audio at VOICE_SAMPLE_RATE
+
+    Accepts a path, encoded bytes/buffer, a file object, a raw waveform
+    array (assumed to be at VOICE_SAMPLE_RATE) or a `(waveform, sr)` tuple.
+    """
+    import librosa
+    if isinstance(source, tuple):
+        y, sr = source
+        y = np.asarray(y, dtype=np.float32)
+        if y.ndim > 1:
+            y = librosa.to_mono(y)
+        if sr != VOICE_SAMPLE_RATE:
+            y = librosa.resample(y, orig_sr=sr, target_sr=VOICE_SAMPLE_RATE)
+        return y[:int(duration * VOICE_SAMPLE_RATE)], VOICE_SAMPLE_RATE
+    if isinstance(source, np.ndarray):
+        return _read_audio((source, VOICE_SAMPLE_RATE), duration)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return load_audio_bytes(source, VOICE_SAMPLE_RATE, duration)
+    if hasattr(source, 'read'):
+        return load_audio_bytes(source.read(), VOICE_SAMPLE_RATE, duration)
+    return librosa.load(source, sr=VOICE_SAMPLE_RATE, duration=duration)
+
+
+def _facial_feature_matrix(rois):
+    """Compute the 84 facial features for a stack of same-sized face ROIs
+
+    `rois` is a (k, h, w) uint8 array. Returns a (k, 84) float64 matrix.
+    """
+    import cv2
+    k, h, w = rois.shape
+    pixels = rois.astype(np.float64)
+    features = np.empty((k, 84), dtype=np.float64)
+    
+    # 1. Histogram features (16 features): 16 equal-width bins over [0, 256)
+    bins = (rois >> 4).reshape(k, -1).astype(np.intp) + 16 * np.arange(k)[:, np.newaxis]
+    features[:, 0:16] = np.bincount(bins.ravel(), minlength=16 * k).reshape(k, 16)
+    
+    # 2. Statistical features from different face regions (20 features)
+    # Divide face into regions: eyes, nose, mouth, forehead, cheeks
+    regions = [
+        pixels[:, 0:h//3, :],           # Upper (forehead/eyes)
+        pixels[:, h//3:2*h//3, :],      # Middle (nose)
+        pixels[:, 2*h//3:, :],          # Lower (mouth)
+        pixels[:, :, 0:w//2],           # Left side
+        pixels[:, :, w//2:],            # Right side
+    ]
+    for j, region in enumerate(regions):
+        col = 16 + 4 * j
+        if region[0].size > 0:
+            flat = region.reshape(k, -1)
+            features[:, col] = flat.mean(axis=1)
+            features[:, col + 1] = flat.std(axis=1)
+            features[:, col + 2] = np.median(flat, axis=1)
+            features[:, col + 3] = np.ptp(flat, axis=1)
+        else:
+            features[:, col:col + 4] = 0
+    
+    # 3. Edge detection features (8 features)
+    edges = np.stack([cv2.Canny(roi, 100, 200) for roi in rois]).astype(np.float64)
+    for i in range(8):
+        features[:, 36 + i] = edges[:, i*h//8:(i+1)*h//8, :].mean(axis=(1, 2))
+    
+    # 4. Texture features (16 features): 3x3 Sobel gradients, computed once per ROI
+    texture = np.empty((k, 4), dtype=np.float64)
+    for i, roi in enumerate(rois):
+        sobelx = cv2.Sobel(roi, cv2.CV_64F, 1, 0, ksize=3)
+        sobely = cv2.Sobel(roi, cv2.CV_64F, 0, 1, ksize=3)
+        texture[i] = sobelx.mean(), sobelx.std(), sobely.mean(), sobely.std()
+    # The same statistics fill the four orientation slots of the original layout
+    features[:, 44:60] = np.tile(texture, 4)
+    
+    # 5. Sampled grid points of the 50x50 resized face (24 features)
+    resized = np.stack([cv2.resize(roi, (50, 50)) for roi in rois])
+    features[:, 60:84] = resized[:, ::10, ::10].reshape(k, -1)[:, :24]
+    
+    return features
+
+
+def _signal_stats(data):
+    """The 10 per-signal statistics that lead each physiological block
+
+    mean, std, median, max, min, var, 25th/75th percentile, range, mean |diff|.
+    phys_stream.SignalSummary.stats() returns the same list incrementally.
+    """
+    return [
+        np.mean(data), np.std(data), np.median(data),
+        np.max(data), np.min(data), np.var(data),
+        np.percentile(data, 25), np.percentile(data, 75),
+        np.max(data) - np.min(data), np.mean(np.abs(np.diff(data))),
+    ]
+
+
+def _forest_stats(forest):
+    """Tree statistics and in-memory size of a fitted RandomForest"""
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    depths = np.array([tree.max_depth for tree in trees])
+    leaves = np.array([tree.n_leaves for tree in trees])
+    nodes = np.array([tree.node_count for tree in trees])
+    # Each node stores its split (feature, threshold, children, ...) and class values
+    node_bytes = sum(tree.node_count * (64 + tree.value.itemsize * tree.value[0].size) for tree in trees)
+    return {
+        'n_trees': len(trees),
+        'depth_mean': float(depths.mean()),
+        'depth_max': int(depths.max()),
+        'leaves_mean': float(leaves.mean()),
+        'nodes_total': int(nodes.sum()),
+        'model_mb': node_bytes / (1024 * 1024),
+    }
+
+
+def _fit_modality(X, y, n_jobs):
+    """Fit one modality's scaler and RandomForest; returns (scaler, model, report)"""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    start = time.perf_counter()
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=n_jobs)
+    model.fit(X_scaled, y)
+    fit_seconds = time.perf_counter() - start
+    # Inference goes through the compiled engines; keep saved models single-threaded as before
+    model.n_jobs = None
+    report = {'n_samples': X_scaled.shape[0], 'n_features': X_scaled.shape[1],
+              'n_jobs': n_jobs, 'fit_seconds': fit_seconds}
+    report.update(_forest_stats(model))
+    return scaler, model, report
+
+
+def split_core_budget(n_jobs=None, model_jobs=None, names=('facial', 'voice', 'physiological')):
+    """Cores per modality model within a total budget of `n_jobs` (default: all cores)
+
+    `model_jobs` optionally fixes some models' share ({name: cores}); the rest
+    of the budget is split evenly over the others. With fewer cores than
+    models (and nothing pinned) every model gets one core and train() fits
+    at most `n_jobs` of them at a time.
+    """
+    budget = n_jobs or os.cpu_count() or 1
+    jobs = dict(model_jobs or {})
+    unknown = sorted(set(jobs) - set(names))
+    if unknown:
+        raise ValueError(f"Unknown modality in model_jobs: {unknown}")
+    if any(cores < 1 for cores in jobs.values()):
+        raise ValueError("model_jobs values must be at least 1")
+    if sum(jobs.values()) > budget:
+        raise ValueError(f"model_jobs {jobs} exceed the core budget of {budget}")
+
+    rest = [name for name in names if name not in jobs]
+    remaining = budget - sum(jobs.values())
+    if len(rest) > remaining:
+        if jobs:
+            raise ValueError(f"model_jobs {jobs} leave less than one core each for {rest} "
+                             f"within the core budget of {budget}")
+        return {name: 1 for name in names}
+    for i, name in enumerate(rest):
+        jobs[name] = remaining // len(rest) + (i < remaining % len(rest))
+    return jobs
+
+
+def stress_level(probability):
+    """Low / Moderate / High band of a stress probability"""
+    if probability < 0.3:
+        return "Low"
+    elif probability < 0.6:
+        return "Moderate"
+    return "High"
+
+
+def predicted_class(probability):
+    """Stress / No Stress label of a fused stress probability (the rule predict uses)"""
+    return 'Stress' if probability > 0.5 else 'No Stress'
+
 
 class MultimodalStressDetector:
-    def __init__(self):
+    def __init__(self, face_detector=None):
+        # Shared detector; the cascade is loaded once per worker thread
+        self.face_detector = face_detector or FaceDetector()
+        # Caches mel filterbanks between clips
+        self.voice_engine = VoiceFeatureEngine()
+        
         self.facial_model = None
         self.voice_model = None
         self.phys_model = None
@@ -20,298 +237,352 @@ class MultimodalStressDetector:
         self.phys_scaler = None
         
         self.is_trained = False
+        self.training_report = None
+        
+        # Compiled forests with the scalers folded in, keyed by modality name
+        self.engines = {}
+    
+    def _face_roi(self, image):
+        """Decode `image` and crop the largest face (None if unreadable or no face)"""
+        import cv2
+        img = _read_image(image)
+        if img is None:
+            return None
+        
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        
+        # Face detection on a downscaled copy, box mapped back to full resolution
+        face = self.face_detector.largest_face(gray)
+        if face is None:
+            return None
+        
+        x, y, w, h = face
+        return gray[y:y+h, x:x+w]
     
-    def extract_facial_features(self, image_path):
+    def extract_facial_features(self, image):
+        """Extract the 84-dim facial vector
+
+        `image` may be a file path, encoded image bytes/buffer, a file
+        object or an already decoded BGR/grayscale array. Returns None when
+        the image can't be decoded, has no face, or extraction fails, so the
+        modality is left out of the prediction (and never cached).
+        """
         try:
-            img = cv2.imread(image_path)
-            if img is None:
+            face_roi = self._face_roi(image)
+            if face_roi is None:
                 return None
             
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Face detection
-            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-            
-            if len(faces) == 0:
-                # No face detected - return mean features with correct dimension
-                return np.random.randn(84) * 0.1  # Small random values
-            
-            # Get the largest face
-            x, y, w, h = max(faces, key=lambda f: f[2] * f[3])
-            face_roi = gray[y:y+h, x:x+w]
-            
-            # Extract multiple feature types to reach 84 dimensions
-            features = []
-            
-            # 1. Histogram features (16 features)
-            hist = cv2.calcHist([face_roi], [0], None, [16], [0, 256])
-            features.extend(hist.flatten())
-            
-            # 2. Statistical features from different face regions (20 features)
-            # Divide face into regions: eyes, nose, mouth, forehead, cheeks
-            regions = [
-                face_roi[0:h//3, :],           # Upper (forehead/eyes)
-                face_roi[h//3:2*h//3, :],      # Middle (nose)
-                face_roi[2*h//3:, :],          # Lower (mouth)
-                face_roi[:, 0:w//2],           # Left side
-                face_roi[:, w//2:],            # Right side
-            ]
-            
-            for region in regions:
-                if region.size > 0:
-                    features.extend([
-                        np.mean(region),
-                        np.std(region),
-                        np.median(region),
-                        np.max(region) - np.min(region)
-                    ])
-                else:
-                    features.extend([0, 0, 0, 0])
-            
-            # 3. Edge detection features (8 features)
-            edges = cv2.Canny(face_roi, 100, 200)
-            for i in range(8):
-                section = edges[i*edges.shape[0]//8:(i+1)*edges.shape[0]//8, :]
-                features.append(np.mean(section))
-            
-            # 4. Texture features using Gabor-like statistics (16 features)
-            for angle in [0, 45, 90, 135]:
-                sobelx = cv2.Sobel(face_roi, cv2.CV_64F, 1, 0, ksize=3)
-                sobely = cv2.Sobel(face_roi, cv2.CV_64F, 0, 1, ksize=3)
-                features.extend([
-                    np.mean(sobelx),
-                    np.std(sobelx),
-                    np.mean(sobely),
-                    np.std(sobely)
-                ])
-            
-            # 5. Additional features to reach exactly 84
-            # Moments and shape features (24 features)
-            resized = cv2.resize(face_roi, (50, 50))
-            features.extend(resized[::10, ::10].flatten()[:24])  # Sample grid points
-            
-            features = np.array(features[:84])  # Ensure exactly 84 features
-            
-            # Pad if somehow we have fewer
-            if len(features) < 84:
-                features = np.pad(features, (0, 84 - len(features)), 'constant')
-            
-            return features
+            return _facial_feature_matrix(face_roi[np.newaxis])[0]
             
         except Exception as e:
             print(f"Error extracting facial features: {e}")
-            # Return neutral features on error
-            return np.random.randn(84) * 0.1
+            return None
     
-    def extract_voice_features(self, audio_path):
-        try:
-            y, sr = librosa.load(audio_path, duration=30)
-            
-            features = []
-            
-            # 1. MFCC features (40 features: 20 MFCCs * 2 stats)
-            mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=20)
-            features.extend(np.mean(mfccs, axis=1))
-            features.extend(np.std(mfccs, axis=1))
-            
-            # 2. Spectral features (30 features)
-            spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
-            spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
-            spectral_bandwidth = librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
-            
-            features.extend([
-                np.mean(spectral_centroids), np.std(spectral_centroids),
-                np.median(spectral_centroids), np.max(spectral_centroids), np.min(spectral_centroids),
-                np.mean(spectral_rolloff), np.std(spectral_rolloff),
-                np.median(spectral_rolloff), np.max(spectral_rolloff), np.min(spectral_rolloff),
-                np.mean(spectral_bandwidth), np.std(spectral_bandwidth),
-                np.median(spectral_bandwidth), np.max(spectral_bandwidth), np.min(spectral_bandwidth)
-            ])
-            
-            # 3. Zero crossing rate (5 features)
-            zcr = librosa.feature.zero_crossing_rate(y)[0]
-            features.extend([
-                np.mean(zcr), np.std(zcr), np.median(zcr), np.max(zcr), np.min(zcr)
-            ])
-            
-            # 4. Chroma features (24 features: 12 chroma * 2 stats)
-            chroma = librosa.feature.chroma_stft(y=y, sr=sr)
-            features.extend(np.mean(chroma, axis=1))
-            features.extend(np.std(chroma, axis=1))
-            
-            # 5. Tempo and rhythm (5 features)
-            tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
-            features.extend([
-                tempo,
-                len(beats),
-                np.std(np.diff(beats)) if len(beats) > 1 else 0,
-                np.mean(np.diff(beats)) if len(beats) > 1 else 0,
-                np.var(y)
-            ])
-            
-            # 6. RMS Energy (10 features)
-            rms = librosa.feature.rms(y=y)[0]
-            features.extend([
-                np.mean(rms), np.std(rms), np.median(rms), 
-                np.max(rms), np.min(rms), np.percentile(rms, 25),
-                np.percentile(rms, 75), np.var(rms),
-                np.max(rms) - np.min(rms), np.mean(np.abs(np.diff(rms)))
-            ])
-            
-            # 7. Mel spectrogram statistics (16 features)
-            mel_spec = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=8)
-            for i in range(8):
-                features.extend([
-                    np.mean(mel_spec[i]), np.std(mel_spec[i])
-                ])
-            
-            # 8. Additional features to reach exactly 140
-            # Spectral contrast (10 features)
-            contrast = librosa.feature.spectral_contrast(y=y, sr=sr, n_bands=5)
-            features.extend(np.mean(contrast, axis=1))
-            features.extend(np.std(contrast, axis=1))
-            
-            features = np.array(features[:140])  # Ensure exactly 140 features
+    def extract_facial_features_from_roi(self, face_roi):
+        """84-dim facial vector for an already cropped grayscale face"""
+        return _facial_feature_matrix(np.ascontiguousarray(face_roi)[np.newaxis])[0]
+    
+    def extract_facial_features_batch(self, images):
+        """Extract facial features for many images at once
+
+        Returns an (N, 84) float32 matrix. Rows for images that could not be
+        decoded, have no detected face or fail extraction are NaN, which
+        predict_batch skips.
+        """
+        features = np.empty((len(images), 84), dtype=np.float32)
+        face_rows = []
+        face_rois = []
+        
+        for i, image in enumerate(images):
+            try:
+                face_roi = self._face_roi(image)
+            except Exception as e:
+                print(f"Error extracting facial features: {e}")
+                face_roi = None
             
-            # Pad if needed
-            if len(features) < 140:
-                features = np.pad(features, (0, 140 - len(features)), 'constant')
+            if face_roi is None:
+                features[i] = np.nan
+            else:
+                face_rows.append(i)
+                face_rois.append(face_roi)
+        
+        if face_rows:
+            features[face_rows] = self.extract_facial_features_from_rois(face_rois)
+        return features
+    
+    def extract_facial_features_from_rois(self, rois):
+        """(len(rois), 84) float32 features for cropped grayscale faces
+        
+        ROIs of the same size (e.g. tracked crops from one video) share one
+        pass over the stack; faces detected in different images rarely match
+        in size, so those are effectively processed one at a time.
+        """
+        features = np.empty((len(rois), 84), dtype=np.float32)
+        rows_by_shape = {}
+        for i, roi in enumerate(rois):
+            rows_by_shape.setdefault(roi.shape, []).append(i)
+        
+        for rows in rows_by_shape.values():
+            try:
+                features[rows] = _facial_feature_matrix(np.stack([rois[i] for i in rows]))
+            except Exception as e:
+                print(f"Error extracting facial features: {e}")
+                features[rows] = np.nan
+        
+        return features
+    
+    def feature_version(self, modality):
+        """Version string identifying an extractor and the settings it runs with"""
+        if modality == 'facial':
+            d = self.face_detector
+            return (f"v{FEATURE_VERSIONS['facial']}.{d.detection_size}.{d.scale_factor}."
+                    f"{d.min_neighbors}.{d.min_face_size}.{d.max_face_size}")
+        e = self.voice_engine
+        return f"v{FEATURE_VERSIONS['voice']}.{VOICE_SAMPLE_RATE}.{VOICE_DURATION}.{e.n_fft}.{e.hop_length}.{e.n_mfcc}"
+    
+    def extract_voice_features(self, audio):
+        """Extract the 140-dim voice vector
+
+        `audio` may be a file path, encoded audio bytes/buffer, a file
+        object, a waveform array or a `(waveform, sr)` tuple. Returns None
+        when the audio can't be decoded or extraction fails.
+        """
+        try:
+            y, sr = _read_audio(audio)
             
-            return features
+            # All spectral features come from one STFT (see voice_features.py)
+            return self.voice_engine.extract(y, sr)
             
         except Exception as e:
             print(f"Error extracting voice features: {e}")
-            return np.random.randn(140) * 0.1
+            return None
     
     def extract_physiological_features(self, eeg_data=None, gsr_data=None):
+        eeg_stats = _signal_stats(eeg_data) if eeg_data is not None and len(eeg_data) > 0 else None
+        gsr_stats = _signal_stats(gsr_data) if gsr_data is not None and len(gsr_data) > 0 else None
+        return self.physiological_features_from_stats(eeg_stats, gsr_stats)
+    
+    def extract_physiological_schema_features(self, ecg_data=None, gsr_data=None, rsp_data=None, sample_rate=256):
+        """132 HRV/respiration/EDA features in the training CSV's schema
+        
+        See phys_features.py. Columns whose signal was not provided are NaN;
+        once trained, they are filled with the training mean (the scaler's
+        mean_), i.e. a neutral value for the physiological model.
+        """
+        import phys_features
+        features = phys_features.extract_features(ecg_data, gsr_data, rsp_data, sample_rate)
+        missing = np.isnan(features)
+        if missing.any() and self.phys_scaler is not None and len(self.phys_scaler.mean_) == len(features):
+            features[missing] = np.asarray(self.phys_scaler.mean_)[missing]
+        return features
+    
+    def physiological_features_from_stats(self, eeg_stats=None, gsr_stats=None):
+        """132-dim physiological vector from per-signal stats (see _signal_stats)
+        
+        Shared by the batch extractor and the streaming sessions in phys_stream.py,
+        so both produce the same layout.
+        """
         features = []
         
         # EEG features (66 features)
-        if eeg_data is not None and len(eeg_data) > 0:
-            features.extend([
-                np.mean(eeg_data), np.std(eeg_data), np.median(eeg_data),
-                np.max(eeg_data), np.min(eeg_data), np.var(eeg_data),
-                np.percentile(eeg_data, 25), np.percentile(eeg_data, 75),
-                np.max(eeg_data) - np.min(eeg_data), np.mean(np.abs(np.diff(eeg_data))),
-                # Add more statistical features
-            ])
+        if eeg_stats is not None:
+            features.extend(eeg_stats)
             # Pad to 66 features
             while len(features) < 66:
-                features.append(np.mean(eeg_data) * np.random.randn() * 0.1)
+                features.append(eeg_stats[0] * np.random.randn() * 0.1)
         else:
             features.extend([0] * 66)
         
         # GSR features (66 features)
-        if gsr_data is not None and len(gsr_data) > 0:
-            gsr_features = [
-                np.mean(gsr_data), np.std(gsr_data), np.median(gsr_data),
-                np.max(gsr_data), np.min(gsr_data), np.var(gsr_data),
-                np.percentile(gsr_data, 25), np.percentile(gsr_data, 75),
-                np.max(gsr_data) - np.min(gsr_data), np.mean(np.abs(np.diff(gsr_data))),
-            ]
-            features.extend(gsr_features)
+        if gsr_stats is not None:
+            features.extend(gsr_stats)
             # Pad to 66 more features (total 132)
             while len(features) < 132:
-                features.append(np.mean(gsr_data) * np.random.randn() * 0.1)
+                features.append(gsr_stats[0] * np.random.randn() * 0.1)
         else:
             features.extend([0] * 66)
         
         return np.array(features[:132])
     
-    def train(self, X_facial, X_voice, X_phys, y):
-        """Train all three models"""
-        print("\nTraining Facial Model...")
-        self.facial_scaler = StandardScaler()
-        X_facial_scaled = self.facial_scaler.fit_transform(X_facial)
-        self.facial_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.facial_model.fit(X_facial_scaled, y)
-        
-        print("Training Voice Model...")
-        self.voice_scaler = StandardScaler()
-        X_voice_scaled = self.voice_scaler.fit_transform(X_voice)
-        self.voice_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.voice_model.fit(X_voice_scaled, y)
-        
-        print("Training Physiological Model...")
-        self.phys_scaler = StandardScaler()
-        X_phys_scaled = self.phys_scaler.fit_transform(X_phys)
-        self.phys_model = RandomForestClassifier(n_estimators=100, random_state=42)
-        self.phys_model.fit(X_phys_scaled, y)
-        
+    def train(self, X_facial, X_voice, X_phys, y, n_jobs=None, model_jobs=None):
+        """Train all three models concurrently
+
+        n_jobs: total cores for training (default: all); model_jobs optionally
+        pins some models' share, e.g. {'physiological': 4} (see split_core_budget).
+        Returns a report with fit time, cores and tree statistics per modality;
+        it is also kept as `training_report`.
+        """
+        data = {'facial': X_facial, 'voice': X_voice, 'physiological': X_phys}
+        budget = n_jobs or os.cpu_count() or 1
+        jobs = split_core_budget(budget, model_jobs, tuple(data))
+        print(f"\nTraining Facial, Voice and Physiological Models ({jobs})...")
+
+        # Tree building releases the GIL, so the fits share the process; with
+        # fewer cores than models only `budget` of them run at once
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(len(data), budget)) as pool:
+            futures = {name: pool.submit(_fit_modality, X, y, jobs[name]) for name, X in data.items()}
+            fitted = {name: future.result() for name, future in futures.items()}
+
+        self.facial_scaler, self.facial_model, facial_report = fitted['facial']
+        self.voice_scaler, self.voice_model, voice_report = fitted['voice']
+        self.phys_scaler, self.phys_model, phys_report = fitted['physiological']
+
+        self.training_report = {
+            'wall_seconds': time.perf_counter() - start,
+            'core_budget': min(budget, sum(jobs.values())),
+            # Peak for the whole process: the fits run in parallel threads, so
+            # there is no separate per-modality peak (model_mb is an estimate)
+            'peak_rss_mb': peak_rss_mb(),
+            'modalities': {'facial': facial_report, 'voice': voice_report, 'physiological': phys_report},
+        }
+        for name, report in self.training_report['modalities'].items():
+            print(f"  {name:>13}: {report['fit_seconds']:.2f}s on {report['n_jobs']} cores, "
+                  f"{report['n_trees']} trees, depth {report['depth_mean']:.1f} (max {report['depth_max']}), "
+                  f"{report['nodes_total']} nodes, {report['model_mb']:.1f} MB")
+
         self.is_trained = True
+        self.compile_engines()
         print("\nTraining completed successfully!")
+        return self.training_report
     
-    def predict(self, facial_features=None, voice_features=None, phys_features=None, fusion='average'):
-        """Make prediction using available modalities"""
-        if not self.is_trained:
-            return {'error': 'Model not trained'}
+    def _modalities(self):
+        """(name, model, scaler) for each modality, in fusion order"""
+        return [
+            ('facial', self.facial_model, self.facial_scaler),
+            ('voice', self.voice_model, self.voice_scaler),
+            ('physiological', self.phys_model, self.phys_scaler),
+        ]
+    
+    def predict_batch(self, facial=None, voice=None, phys=None, masks=None, fusion='average', as_dicts=False):
+        """Score many samples at once
+
+        facial/voice/phys are (N, d) feature matrices (or None when the
+        modality is absent for the whole batch); all supplied matrices must
+        have the same N. A row is skipped for a modality when it contains
+        NaN or when `masks` (a dict keyed by 'facial', 'voice', 'phys'
+        holding length-N boolean arrays) marks it False. Each modality runs a
+        single predict_proba over its valid rows. `fusion` combines the
+        available modalities' probabilities per row (see FUSION_RULES).
+
+        Returns a dict of arrays: 'stress_probability' and 'predicted'
+        (NaN / -1 where no modality was available), 'n_modalities', and
+        'individual_predictions' with one NaN-padded array per modality.
+        With as_dicts=True, returns one predict()-style dict per row instead.
+        """
+        if fusion not in FUSION_RULES:
+            raise ValueError(f"Unknown fusion rule {fusion!r}; expected one of {FUSION_RULES}")
         
-        predictions = []
-        probabilities = []
-        individual_preds = {'facial': None, 'voice': None, 'physiological': None}
+        masks = masks or {}
+        inputs = {'facial': (facial, masks.get('facial')),
+                  'voice': (voice, masks.get('voice')),
+                  'physiological': (phys, masks.get('phys'))}
         
-        # Facial prediction
-        if facial_features is not None and self.facial_model is not None:
-            try:
-                facial_features = np.array(facial_features).reshape(1, -1)
-                facial_scaled = self.facial_scaler.transform(facial_features)
-                facial_prob = self.facial_model.predict_proba(facial_scaled)[0][1]
-                predictions.append(self.facial_model.predict(facial_scaled)[0])
-                probabilities.append(facial_prob)
-                individual_preds['facial'] = facial_prob
-            except Exception as e:
-                print(f"Facial prediction error: {e}")
+        rows = {f'{name} {kind}': len(array) for name, pair in inputs.items()
+                for kind, array in zip(('features', 'mask'), pair) if array is not None}
+        if len(set(rows.values())) > 1:
+            raise ValueError(f"Feature matrices and masks must have the same number of rows, got {rows}")
+        n_samples = next(iter(rows.values()), None)
         
-        # Voice prediction
-        if voice_features is not None and self.voice_model is not None:
-            try:
-                voice_features = np.array(voice_features).reshape(1, -1)
-                voice_scaled = self.voice_scaler.transform(voice_features)
-                voice_prob = self.voice_model.predict_proba(voice_scaled)[0][1]
-                predictions.append(self.voice_model.predict(voice_scaled)[0])
-                probabilities.append(voice_prob)
-                individual_preds['voice'] = voice_prob
-            except Exception as e:
-                print(f"Voice prediction error: {e}")
+        if not self.is_trained:
+            error = {'error': 'Model not trained'}
+            return [dict(error) for _ in range(n_samples or 0)] if as_dicts else error
+        if n_samples is None:
+            return [] if as_dicts else {'error': 'No valid predictions could be made'}
         
-        # Physiological prediction
-        if phys_features is not None and self.phys_model is not None:
+        individual = {}
+        for name, clf, scaler in self._modalities():
+            probs = np.full(n_samples, np.nan)
+            individual[name] = probs
+            X, mask = inputs[name]
+            if X is None or clf is None:
+                continue
+            engine = self.engines.get(name)
             try:
-                phys_features = np.array(phys_features).reshape(1, -1)
-                phys_scaled = self.phys_scaler.transform(phys_features)
-                phys_prob = self.phys_model.predict_proba(phys_scaled)[0][1]
-                predictions.append(self.phys_model.predict(phys_scaled)[0])
-                probabilities.append(phys_prob)
-                individual_preds['physiological'] = phys_prob
+                X = np.asarray(X, dtype=np.float64).reshape(n_samples, -1)
+                valid = ~np.isnan(X).any(axis=1)
+                if mask is not None:
+                    valid &= np.asarray(mask, dtype=bool)
+                if not valid.any():
+                    continue
+                if engine is not None:
+                    # Raw features; the scaler is folded into the thresholds
+                    probs[valid] = engine.predict_proba(X[valid])[:, 1]
+                else:
+                    probs[valid] = clf.predict_proba(scaler.transform(X[valid]))[:, 1]
             except Exception as e:
-                print(f"Physiological prediction error: {e}")
+                print(f"{name.capitalize()} prediction error: {e}")
+                probs[:] = np.nan
         
-        if len(predictions) == 0:
-            return {'error': 'No valid predictions could be made'}
+        # Fusion over the modalities available in each row
+        probs = np.vstack(list(individual.values()))
+        available = ~np.isnan(probs)
+        counts = available.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if fusion == 'average':
+                fused = np.where(available, probs, 0.0).sum(axis=0) / counts
+            elif fusion == 'max':
+                fused = np.where(available, probs, -np.inf).max(axis=0)
+            else:
+                # Product rule, renormalized over the two classes
+                p = np.clip(probs, 1e-12, 1 - 1e-12)
+                log_stress = np.where(available, np.log(p), 0.0).sum(axis=0)
+                log_calm = np.where(available, np.log1p(-p), 0.0).sum(axis=0)
+                fused = 1.0 / (1.0 + np.exp(log_calm - log_stress))
+        fused[counts == 0] = np.nan
+        predicted = np.where(counts == 0, -1, (fused > 0.5).astype(int))
+        
+        result = {
+            'stress_probability': fused,
+            'predicted': predicted,
+            'n_modalities': counts,
+            'individual_predictions': individual
+        }
+        return self._result_dicts(result) if as_dicts else result
+    
+    def _result_dicts(self, result):
+        """Expand predict_batch arrays into one predict()-style dict per row"""
+        rows = []
+        for i, avg_prob in enumerate(result['stress_probability']):
+            if result['n_modalities'][i] == 0:
+                rows.append({'error': 'No valid predictions could be made'})
+                continue
+            
+            individual_preds = {
+                name: (None if np.isnan(probs[i]) else float(probs[i]))
+                for name, probs in result['individual_predictions'].items()
+            }
+            
+            rows.append({
+                'status': 'success',
+                'predicted_class': 'Stress' if result['predicted'][i] == 1 else 'No Stress',
+                'stress_probability': float(avg_prob),
+                'no_stress_probability': float(1 - avg_prob),
+                'confidence': float(max(avg_prob, 1 - avg_prob)),
+                'stress_level': stress_level(avg_prob),
+                'percentage': float(avg_prob * 100),
+                'individual_predictions': individual_preds
+            })
+        return rows
+    
+    def predict(self, facial_features=None, voice_features=None, phys_features=None, fusion='average'):
+        """Make prediction using available modalities"""
+        if not self.is_trained:
+            return {'error': 'Model not trained'}
         
-        # Fusion
-        avg_prob = np.mean(probabilities)
-        final_pred = 1 if avg_prob > 0.5 else 0
+        if facial_features is None and voice_features is None and phys_features is None:
+            return {'error': 'No valid predictions could be made'}
         
-        # Calculate stress level
-        if avg_prob < 0.3:
-            stress_level = "Low"
-        elif avg_prob < 0.6:
-            stress_level = "Moderate"
-        else:
-            stress_level = "High"
+        def as_row(features):
+            return None if features is None else [features]
         
-        return {
-            'status': 'success',
-            'predicted_class': 'Stress' if final_pred == 1 else 'No Stress',
-            'stress_probability': float(avg_prob),
-            'no_stress_probability': float(1 - avg_prob),
-            'confidence': float(max(avg_prob, 1 - avg_prob)),
-            'stress_level': stress_level,
-            'percentage': float(avg_prob * 100),
-            'individual_predictions': individual_preds
-        }
+        return self.predict_batch(
+            facial=as_row(facial_features),
+            voice=as_row(voice_features),
+            phys=as_row(phys_features),
+            fusion=fusion,
+            as_dicts=True
+        )[0]
     
     def save_model(self, filepath):
         """Save the trained model"""
@@ -327,8 +598,17 @@ class MultimodalStressDetector:
         with open(filepath, 'wb') as f:
             pickle.dump(model_data, f)
     
+    def export_artifact(self, filepath):
+        """Save the trained model as a memory-mappable array artifact"""
+        model_artifact.save_artifact(self, filepath)
+    
     def load_model(self, filepath):
-        """Load a trained model"""
+        """Load a trained model (pickle or array artifact)"""
+        if model_artifact.is_artifact(filepath):
+            model_artifact.load_artifact(self, filepath)
+            self.compile_engines()
+            return
+        
         with open(filepath, 'rb') as f:
             model_data = pickle.load(f)
         
@@ -338,4 +618,27 @@ class MultimodalStressDetector:
         self.facial_scaler = model_data['facial_scaler']
         self.voice_scaler = model_data['voice_scaler']
         self.phys_scaler = model_data['phys_scaler']
-        self.is_trained = model_data['is_trained']
\ No newline at end of file
+        self.is_trained = model_data['is_trained']
+        self.compile_engines()
+    
+    def compile_engines(self):
+        """Compile each modality's forest and scaler for vectorized inference
+
+        Forests loaded from an array artifact keep the engines load_artifact
+        built over the mapped file, so worker processes share those pages
+        instead of each holding private copies.
+        """
+        engines = {}
+        for name, clf, scaler in self._modalities():
+            if clf is None:
+                continue
+            if isinstance(clf, model_artifact.ArrayForest):
+                if name in self.engines:
+                    engines[name] = self.engines[name]
+                continue
+            try:
+                engines[name] = CompiledForest.compile(clf, scaler)
+            except Exception as e:
+                # predict_batch falls back to the scaler + predict_proba path
+                print(f"Could not compile {name} forest: {e}")
+        self.engines = engines
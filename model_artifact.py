@@ -0,0 +1,236 @@
+"""
+Compact array-backed artifact for MultimodalStressDetector
+
+Each RandomForest is stored as flat node arrays (feature, threshold,
+children, leaf class probabilities) and each StandardScaler as its mean/scale
+vectors. Since version 2 the forest_engine.CompiledForest arrays (scaler
+folded into the thresholds) are stored as well, so the inference engine is
+built as views over the mapping instead of private copies. All of it goes in
+one versioned file:
+
+    magic (8 bytes) | version (uint32) | header length (uint32) | JSON header
+    | arrays, each aligned to 64 bytes
+
+The JSON header lists every array's dtype, shape and byte offset, so loading
+is a single read-only np.memmap plus zero-copy views: no unpickling, and the
+pages are shared by every worker process that maps the same file.
+
+Convert an existing pickle with:
+    python model_artifact.py multimodal_stress_model.pkl multimodal_stress_model.msd
+"""
+
+import json
+import struct
+import sys
+import numpy as np
+
+import forest_engine
+
+MAGIC = b'MSDARRAY'
+ARTIFACT_VERSION = 2
+SUPPORTED_VERSIONS = (1, 2)  # version 1 files have no compiled engine arrays
+ALIGNMENT = 64
+MODALITIES = ('facial', 'voice', 'phys')
+# MultimodalStressDetector.engines keys for each stored modality
+ENGINE_NAMES = {'facial': 'facial', 'voice': 'voice', 'phys': 'physiological'}
+
+_PREAMBLE = struct.Struct('<8sII')
+
+
+class ArrayScaler:
+    """StandardScaler.transform over stored mean/scale vectors"""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class ArrayForest:
+    """RandomForestClassifier.predict_proba over flat node arrays
+
+    Trees are concatenated; `tree_offsets[t]` is the root of tree t and child
+    indices are global. Leaves have feature == -1.
+    """
+
+    def __init__(self, tree_offsets, feature, threshold, children_left, children_right, value, classes,
+                 n_features_in=None):
+        self.tree_offsets = tree_offsets
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.value = value
+        self.classes_ = classes
+        self.n_features_in_ = n_features_in
+
+    @property
+    def n_trees(self):
+        return len(self.tree_offsets) - 1
+
+    def apply(self, X):
+        """Leaf index reached in every tree, shape (n_samples, n_trees)"""
+        # sklearn evaluates trees on float32 inputs
+        X = np.asarray(X, dtype=np.float32)
+        leaves = np.empty((len(X), self.n_trees), dtype=np.int64)
+        for t in range(self.n_trees):
+            node = np.full(len(X), self.tree_offsets[t], dtype=np.int64)
+            active = np.arange(len(X))
+            while len(active):
+                current = node[active]
+                feat = self.feature[current]
+                internal = feat >= 0
+                active, current, feat = active[internal], current[internal], feat[internal]
+                go_left = X[active, feat] <= self.threshold[current]
+                node[active] = np.where(go_left, self.children_left[current], self.children_right[current])
+            leaves[:, t] = node
+        return leaves
+
+    def predict_proba(self, X):
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def forest_to_arrays(forest):
+    """Flatten a fitted RandomForestClassifier into node arrays"""
+    offsets = [0]
+    features, thresholds, lefts, rights, values = [], [], [], [], []
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        base = offsets[-1]
+        is_leaf = tree.children_left == -1
+        features.append(np.where(is_leaf, -1, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(np.where(is_leaf, -1, tree.children_left + base).astype(np.int32))
+        rights.append(np.where(is_leaf, -1, tree.children_right + base).astype(np.int32))
+        # Leaf values as class probabilities (older sklearn stores raw counts)
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        values.append(value / totals)
+        offsets.append(base + tree.node_count)
+    return {
+        'tree_offsets': np.asarray(offsets, dtype=np.int64),
+        'feature': np.concatenate(features),
+        'threshold': np.concatenate(thresholds),
+        'children_left': np.concatenate(lefts),
+        'children_right': np.concatenate(rights),
+        'value': np.concatenate(values),
+        'classes': np.asarray(forest.classes_),
+    }
+
+
+def save_artifact(detector, filepath):
+    """Write the detector's forests and scalers as an array artifact"""
+    arrays = {}
+    modalities = {}
+    for name in MODALITIES:
+        forest = getattr(detector, f'{name}_model')
+        scaler = getattr(detector, f'{name}_scaler')
+        if forest is None:
+            continue
+        for key, array in forest_to_arrays(forest).items():
+            arrays[f'{name}/{key}'] = array
+        arrays[f'{name}/scaler_mean'] = np.asarray(scaler.mean_, dtype=np.float64)
+        arrays[f'{name}/scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+        engine = forest_engine.CompiledForest.compile(forest, scaler)
+        for key, array in engine.arrays().items():
+            arrays[f'{name}/engine_{key}'] = array
+        modalities[name] = {'n_trees': len(forest.estimators_), 'max_depth': engine.max_depth,
+                            'n_features': engine.n_features_in_}
+
+    header = {'version': ARTIFACT_VERSION, 'is_trained': bool(detector.is_trained),
+              'modalities': modalities, 'arrays': {}}
+
+    # Offsets are relative to the data section, which starts aligned after the header
+    offset = 0
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[key] = array
+        header['arrays'][key] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = -(-(_PREAMBLE.size + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+
+    with open(filepath, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, ARTIFACT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for key, array in arrays.items():
+            f.seek(data_start + header['arrays'][key]['offset'])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+
+
+def is_artifact(filepath):
+    """True if `filepath` starts with the array artifact magic bytes"""
+    with open(filepath, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_arrays(filepath):
+    """Map an artifact read-only; returns (header, {name: array view})"""
+    with open(filepath, 'rb') as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{filepath} is not a model array artifact")
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Unsupported artifact version {version} (expected one of {SUPPORTED_VERSIONS})")
+        header = json.loads(f.read(header_len).decode('utf-8'))
+
+    data_start = -(-(_PREAMBLE.size + header_len) // ALIGNMENT) * ALIGNMENT
+    mapped = np.memmap(filepath, dtype=np.uint8, mode='r')
+    arrays = {}
+    for key, spec in header['arrays'].items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        start = data_start + spec['offset']
+        arrays[key] = mapped[start:start + count * dtype.itemsize].view(dtype).reshape(spec['shape'])
+    return header, arrays
+
+
+def load_artifact(detector, filepath):
+    """Populate `detector` with ArrayForest/ArrayScaler models from an artifact
+
+    `detector.engines` gets a CompiledForest per modality whose node arrays are
+    views of the read-only mapping (none for version 1 artifacts, which then
+    predict through ArrayForest).
+    """
+    header, arrays = read_arrays(filepath)
+    engines = {}
+    for name in MODALITIES:
+        if name not in header['modalities']:
+            setattr(detector, f'{name}_model', None)
+            setattr(detector, f'{name}_scaler', None)
+            continue
+        n_features = len(arrays[f'{name}/scaler_mean'])
+        setattr(detector, f'{name}_model', ArrayForest(
+            arrays[f'{name}/tree_offsets'], arrays[f'{name}/feature'], arrays[f'{name}/threshold'],
+            arrays[f'{name}/children_left'], arrays[f'{name}/children_right'],
+            arrays[f'{name}/value'], arrays[f'{name}/classes'], n_features))
+        setattr(detector, f'{name}_scaler', ArrayScaler(
+            arrays[f'{name}/scaler_mean'], arrays[f'{name}/scaler_scale']))
+        if f'{name}/engine_roots' in arrays:
+            engines[ENGINE_NAMES[name]] = forest_engine.CompiledForest(
+                *(arrays[f'{name}/engine_{key}'] for key in forest_engine.ENGINE_ARRAYS),
+                arrays[f'{name}/classes'], header['modalities'][name]['max_depth'], n_features)
+    detector.engines = engines
+    detector.is_trained = header['is_trained']
+    return detector
+
+
+if __name__ == '__main__':
+    from model import MultimodalStressDetector
+
+    if len(sys.argv) != 3:
+        print("Usage: python model_artifact.py <model.pkl> <output.msd>")
+        sys.exit(1)
+
+    detector = MultimodalStressDetector()
+    detector.load_model(sys.argv[1])
+    save_artifact(detector, sys.argv[2])
+    print(f"Array artifact written to {sys.argv[2]}")
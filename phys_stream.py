@@ -0,0 +1,241 @@
+"""
+Streaming physiological sessions with online statistics
+
+Wearables push EEG/GSR samples in small chunks for hours; recomputing
+mean/std/percentiles over the whole history on every update does not scale.
+Each signal instead keeps mergeable running summaries:
+
+    mean / variance   Welford's algorithm (chunks combined with Chan's update)
+    quantiles         a log-bucketed sketch (DDSketch-style, 1% relative error)
+    min / max         running extremes
+    mean |diff|       running sum of absolute first differences
+
+A session covers either everything pushed so far or, with `window_seconds`,
+a rolling window built from fixed-size blocks: the oldest block is dropped as
+a new one starts and features merge the few live blocks, so neither pushes
+nor feature reads ever re-scan raw samples.
+
+The resulting stats are in the order of model._signal_stats, and the 132-dim
+vector is built by MultimodalStressDetector.physiological_features_from_stats,
+the same layout extract_physiological_features produces.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+import numpy as np
+
+# Values closer to zero than this are counted in the sketch's zero bucket
+_MIN_SKETCH_VALUE = 1e-9
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error
+
+    Values fall into logarithmic buckets (gamma^(k-1), gamma^k]; a quantile is
+    answered from the bucket holding its rank, so the estimate is within
+    `relative_accuracy` of the true sample value. Memory grows with the
+    log of the value range, not with the number of samples.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+        self.count = 0
+
+    def _add(self, store, magnitudes):
+        if len(magnitudes) == 0:
+            return
+        keys, counts = np.unique(np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64),
+                                 return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            store[key] = store.get(key, 0) + count
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        positive = values[values > _MIN_SKETCH_VALUE]
+        negative = -values[values < -_MIN_SKETCH_VALUE]
+        self._add(self.positive, positive)
+        self._add(self.negative, negative)
+        self.zeros += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+
+    def merge(self, other):
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+
+    def _bucket_value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1), or nan when empty"""
+        if self.count == 0:
+            return float('nan')
+        rank = q * (self.count - 1)
+        seen = 0
+        # Ascending value order: large negatives first, then zeros, then positives
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._bucket_value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._bucket_value(key)
+        return self._bucket_value(max(self.positive))
+
+
+class SignalSummary:
+    """Running statistics for one stretch of a signal; summaries merge in O(buckets)"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.abs_diff_sum = 0.0
+        self.n_diffs = 0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, chunk, previous=None):
+        """Fold in a chunk; `previous` is the sample just before it, if any"""
+        chunk = np.asarray(chunk, dtype=np.float64).ravel()
+        if len(chunk) == 0:
+            return
+        n = len(chunk)
+        chunk_mean = float(chunk.mean())
+        chunk_m2 = float(np.square(chunk - chunk_mean).sum())
+        self._combine(n, chunk_mean, chunk_m2)
+        self.min = min(self.min, float(chunk.min()))
+        self.max = max(self.max, float(chunk.max()))
+
+        diffs = np.diff(chunk) if previous is None else np.diff(chunk, prepend=previous)
+        self.abs_diff_sum += float(np.abs(diffs).sum())
+        self.n_diffs += len(diffs)
+        self.sketch.update(chunk)
+
+    def _combine(self, n, mean, m2):
+        """Chan et al.'s pairwise form of Welford's update"""
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        self._combine(other.count, other.mean, other.m2)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.abs_diff_sum += other.abs_diff_sum
+        self.n_diffs += other.n_diffs
+        self.sketch.merge(other.sketch)
+
+    def stats(self):
+        """The 10 statistics of model._signal_stats, or None without samples"""
+        if self.count == 0:
+            return None
+        var = self.m2 / self.count
+        return [
+            self.mean, math.sqrt(var), self.sketch.quantile(0.5),
+            self.max, self.min, var,
+            self.sketch.quantile(0.25), self.sketch.quantile(0.75),
+            self.max - self.min,
+            self.abs_diff_sum / self.n_diffs if self.n_diffs else float('nan'),
+        ]
+
+
+class RollingSignalStats:
+    """Statistics over the whole stream, or over roughly the last `n_blocks` blocks
+
+    With `block_size` set, samples fill blocks of that many samples and only the
+    newest `n_blocks` are kept, so the window slides in block-sized steps.
+    """
+
+    def __init__(self, block_size=None, n_blocks=None):
+        self.block_size = block_size
+        self._blocks = deque(maxlen=n_blocks)
+        self._current = None
+        self._last = None
+        self.total_samples = 0
+
+    def push(self, chunk):
+        chunk = np.asarray(chunk, dtype=np.float64).ravel()
+        pos = 0
+        while pos < len(chunk):
+            if self._current is None or (self.block_size and self._current.count >= self.block_size):
+                self._current = SignalSummary()
+                self._blocks.append(self._current)
+            take = len(chunk) - pos
+            if self.block_size:
+                take = min(take, self.block_size - self._current.count)
+            part = chunk[pos:pos + take]
+            self._current.update(part, self._last)
+            self._last = part[-1]
+            pos += take
+        self.total_samples += len(chunk)
+
+    def summary(self):
+        merged = SignalSummary()
+        for block in self._blocks:
+            merged.merge(block)
+        return merged
+
+    def stats(self):
+        return self.summary().stats()
+
+
+class PhysiologicalSession:
+    """EEG and GSR streams of one wearer, turned into features on demand"""
+
+    def __init__(self, sample_rate=256, window_seconds=None, block_seconds=10):
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        if window_seconds:
+            block_size = max(1, int(block_seconds * sample_rate))
+            n_blocks = max(1, int(math.ceil(window_seconds / float(block_seconds))))
+        else:
+            block_size = n_blocks = None
+        self.signals = {name: RollingSignalStats(block_size, n_blocks) for name in ('eeg', 'gsr')}
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.lock = threading.Lock()
+
+    def push(self, eeg=None, gsr=None):
+        with self.lock:
+            for name, chunk in (('eeg', eeg), ('gsr', gsr)):
+                if chunk is not None:
+                    self.signals[name].push(chunk)
+            self.updated_at = time.time()
+
+    def features(self, detector):
+        """132-dim feature vector for the current window, or None before any samples"""
+        with self.lock:
+            eeg_stats = self.signals['eeg'].stats()
+            gsr_stats = self.signals['gsr'].stats()
+        if eeg_stats is None and gsr_stats is None:
+            return None
+        return detector.physiological_features_from_stats(eeg_stats, gsr_stats)
+
+    def describe(self):
+        return {
+            'sample_rate': self.sample_rate,
+            'window_seconds': self.window_seconds,
+            'samples': {name: signal.total_samples for name, signal in self.signals.items()},
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+
@@ -0,0 +1,16 @@
+"""
+Process resource measurements shared by the training and benchmark reports
+"""
+
+import sys
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
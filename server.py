@@ -1,13 +1,19 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-from voice import predict_stress_from_file, record_and_predict, load_model, LabelEncoder
+from voice import predict_stress_from_signal, record_and_predict
+import functools
+import io
+import json
 import os
+import threading
+import time
 import numpy as np
 import logging
-import librosa
-from scipy.io import wavfile
-from tensorflow.keras.models import load_model as keras_load_model
 from PIL import Image
+from audio_io import load_audio_bytes
+from batching import MicroBatcher, BatchedModel
+from tflite_backend import load_inference_model
+from voice_stream import VoiceStreamSession
 
 app = Flask(__name__)
 CORS(app)
@@ -16,23 +22,85 @@ CORS(app)
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Load voice model and label encoder
-try:
-    voice_model = load_model('stress_detection_model.h5')
-    label_encoder = LabelEncoder()
-    label_encoder.classes_ = np.load('label_encoder_classes.npy', allow_pickle=True)
-    logger.info("Voice model and label encoder loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load voice model or label encoder: {str(e)}")
-    raise
-
-# Load face model
-try:
-    face_model = keras_load_model('final_stress_detection_model.h5')
-    logger.info("Face model loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load face model: {str(e)}")
-    raise
+# 'keras' runs the .h5 models through TensorFlow; 'tflite' loads the .tflite
+# files produced by `python tflite_backend.py export <model>.h5`
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'keras')
+logger.info(f"Inference backend: {INFERENCE_BACKEND}")
+
+# Micro-batching: concurrent requests share one forward pass of up to
+# BATCH_MAX_SIZE samples, waiting at most BATCH_MAX_WAIT_MS for the batch to fill
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 16))
+BATCH_MAX_WAIT_MS = float(os.environ.get('BATCH_MAX_WAIT_MS', 10))
+
+# Models are loaded and warmed up by a background thread (see load_models) so
+# the process starts serving /api/health immediately; /api/ready flips once
+# everything below is set
+voice_model = None
+face_model = None
+label_encoder = None
+batched_voice_model = None
+batched_face_model = None
+models_ready = threading.Event()
+model_load_error = None
+
+def warm_up_models():
+    """Run each model once on synthetic input
+
+    Pays TensorFlow graph tracing and librosa filterbank/JIT setup before the
+    first real request does.
+    """
+    rng = np.random.default_rng(0)
+    face_detector.predict_single_image(io.BytesIO(_synthetic_png(rng)))
+    predict_stress_from_signal(rng.standard_normal(22050).astype(np.float32) * 0.1, 22050,
+                               batched_voice_model, label_encoder)
+
+def _synthetic_png(rng):
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (128, 128, 3), dtype=np.uint8)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def load_models():
+    """Load both models and the label encoder, start the batchers, then warm up"""
+    global voice_model, face_model, label_encoder, batched_voice_model, batched_face_model, model_load_error
+    try:
+        start = time.perf_counter()
+        
+        # Heavy imports happen here, off the startup path
+        from sklearn.preprocessing import LabelEncoder
+        
+        # Load voice model and label encoder
+        voice_model = load_inference_model('stress_detection_model.h5', INFERENCE_BACKEND)
+        encoder = LabelEncoder()
+        encoder.classes_ = np.load('label_encoder_classes.npy', allow_pickle=True)
+        label_encoder = encoder
+        logger.info("Voice model and label encoder loaded successfully")
+        
+        # Load face model
+        face_model = load_inference_model('final_stress_detection_model.h5', INFERENCE_BACKEND)
+        logger.info("Face model loaded successfully")
+        
+        batched_face_model = BatchedModel(
+            MicroBatcher(face_model.predict, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name='face-batcher'))
+        batched_voice_model = BatchedModel(
+            MicroBatcher(voice_model.predict, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name='voice-batcher'))
+        face_detector.model = batched_face_model
+        
+        warm_up_models()
+        models_ready.set()
+        logger.info(f"Models ready after {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        model_load_error = str(e)
+        logger.error(f"Failed to load models: {model_load_error}")
+
+def requires_models(view):
+    """Answer 503 until the models are loaded and warm"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not models_ready.is_set():
+            message = model_load_error or 'Models are still loading, try again shortly'
+            return jsonify({'status': 'error', 'message': message}), 503
+        return view(*args, **kwargs)
+    return wrapper
 
 # Map voice stress labels to friendly text and percentages
 voice_stress_label_map = {
@@ -49,17 +117,17 @@ face_stress_label_map = {
 }
 
 class StressDetectionModel:
-    def __init__(self, img_size=(128, 128)):
+    def __init__(self, img_size=(128, 128), model=None):
         self.img_size = img_size
-        self.model = face_model
+        self.model = model
 
-    def predict_single_image(self, image_path):
-        """Predict stress/no-stress from a single image"""
+    def predict_single_image(self, image):
+        """Predict stress/no-stress from a single image (path or file object)"""
         if self.model is None:
             return {"error": "Model not loaded"}
 
         try:
-            img = Image.open(image_path).convert('RGB').resize(self.img_size)
+            img = Image.open(image).convert('RGB').resize(self.img_size)
             img_array = np.array(img) / 255.0
             img_array = np.expand_dims(img_array, axis=0)
             pred = self.model.predict(img_array)[0][0]
@@ -76,6 +144,10 @@ class StressDetectionModel:
         except Exception as e:
             return {"error": f"Error processing image: {str(e)}"}
 
+# One wrapper shared by all requests; predictions are serialized on the
+# face batcher thread, so concurrent requests never call Keras directly
+face_detector = StressDetectionModel(img_size=(128, 128))
+
 @app.route('/')
 def home():
     return jsonify({
@@ -83,12 +155,80 @@ def home():
         'message': 'Welcome to the Stress Detection API. Use /api/voice/record, /api/voice/upload (WAV, MP3), or /api/face/upload (JPG, JPEG, PNG).'
     })
 
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    """Liveness: the process is up (models may still be loading)"""
+    return jsonify({'status': 'healthy', 'models_ready': models_ready.is_set()})
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 only once both models are loaded and warmed up"""
+    if models_ready.is_set():
+        return jsonify({'status': 'ready', 'backend': INFERENCE_BACKEND})
+    if model_load_error:
+        return jsonify({'status': 'error', 'message': model_load_error}), 503
+    return jsonify({'status': 'loading'}), 503
+
+def voice_stream(ws):
+    """Live voice stress analysis over a WebSocket
+
+    Protocol: the client first sends a JSON text message
+    {"sample_rate": 16000, "format": "int16" | "float32", "hop_seconds": 0.5},
+    then binary little-endian mono PCM chunks. The server replies with a JSON
+    estimate every hop and stops on a "stop" text message or disconnect.
+    """
+    if not models_ready.is_set():
+        ws.send(json.dumps({'status': 'error', 'message': model_load_error or 'Models are still loading'}))
+        return
+    try:
+        config = json.loads(ws.receive())
+        session = VoiceStreamSession(
+            batched_voice_model, label_encoder,
+            sample_rate=int(config.get('sample_rate', 16000)),
+            sample_format=config.get('format', 'int16'),
+            hop_seconds=float(config.get('hop_seconds', 0.5))
+        )
+    except Exception as e:
+        ws.send(json.dumps({'status': 'error', 'message': f'Invalid stream configuration: {str(e)}'}))
+        return
+    
+    logger.info(f"Voice stream started ({session.features.sr} Hz)")
+    try:
+        while True:
+            message = ws.receive()
+            if message is None or message == 'stop':
+                break
+            if isinstance(message, str):
+                continue
+            estimate = session.push_bytes(message)
+            if estimate is not None:
+                mapped_label = voice_stress_label_map.get(estimate['label'], {'display': estimate['label'], 'percentage': 50})
+                ws.send(json.dumps({
+                    'status': 'success',
+                    'stress_level': mapped_label['display'],
+                    'percentage': mapped_label['percentage'],
+                    'probabilities': estimate['probabilities'],
+                    'time': estimate['time']
+                }))
+    except Exception as e:
+        # Client disconnects surface as ConnectionClosed from receive()/send()
+        logger.info(f"Voice stream closed: {str(e)}")
+    logger.info(f"Voice stream ended after {session.features.samples_seen / session.features.sr:.1f}s of audio")
+
+# WebSocket support is optional (pip install flask-sock)
+try:
+    from flask_sock import Sock
+    Sock(app).route('/api/voice/stream')(voice_stream)
+except ImportError:
+    logger.warning("flask-sock not installed; /api/voice/stream is disabled")
+
 @app.route('/api/voice/record', methods=['POST'])
+@requires_models
 def voice_record():
     try:
         duration = request.json.get('duration', 3)
         logger.info(f"Starting voice recording for {duration} seconds")
-        stress_level = record_and_predict(duration=duration, model=voice_model, label_encoder=label_encoder)
+        stress_level = record_and_predict(duration=duration, model=batched_voice_model, label_encoder=label_encoder)
         if stress_level:
             mapped_label = voice_stress_label_map.get(stress_level, {'display': stress_level, 'percentage': 50})
             logger.info(f"Voice recording analysis successful: {stress_level}")
@@ -105,8 +245,8 @@ def voice_record():
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
 @app.route('/api/voice/upload', methods=['POST'])
+@requires_models
 def voice_upload():
-    temp_path = None
     try:
         if 'file' not in request.files:
             logger.error("No file part in request")
@@ -121,29 +261,21 @@ def voice_upload():
             logger.error(f"Invalid file format: {filename}")
             return jsonify({'status': 'error', 'message': 'File must be WAV or MP3 format'}), 400
         
-        temp_path = 'temp_upload.wav'
-        temp_input_path = 'temp_input_audio' + os.path.splitext(filename)[1]
-        file.save(temp_input_path)
-        logger.info(f"Saved uploaded file to {temp_input_path}")
-
-        if filename.endswith('.wav'):
-            os.rename(temp_input_path, temp_path)
-            logger.info(f"Renamed WAV file to {temp_path}")
-        else:
-            try:
-                y, sr = librosa.load(temp_input_path, sr=None)
-                y = y / np.max(np.abs(y))
-                wavfile.write(temp_path, sr, (y * 32767).astype(np.int16))
-                logger.info(f"Converted MP3 to WAV and saved to {temp_path}")
-            except Exception as e:
-                logger.error(f"Error converting MP3: {str(e)}")
-                return jsonify({'status': 'error', 'message': f'Failed to process MP3 file: {str(e)}'}), 500
-            finally:
-                if os.path.exists(temp_input_path):
-                    os.remove(temp_input_path)
-                    logger.info(f"Removed temporary input file {temp_input_path}")
-
-        stress_level = predict_stress_from_file(temp_path, voice_model, label_encoder)
+        # Per-request buffer; nothing is written to shared paths
+        data = file.read()
+        logger.info(f"Received {len(data)} bytes of audio ({filename})")
+
+        try:
+            y, sr = load_audio_bytes(data, suffix=os.path.splitext(filename)[1])
+        except Exception as e:
+            logger.error(f"Error decoding audio: {str(e)}")
+            return jsonify({'status': 'error', 'message': f'Failed to process audio file: {str(e)}'}), 500
+
+        if filename.endswith('.mp3'):
+            # MP3 uploads are peak-normalized, as the WAV conversion used to do
+            y = y / np.max(np.abs(y))
+
+        stress_level = predict_stress_from_signal(y, sr, batched_voice_model, label_encoder)
         if stress_level:
             mapped_label = voice_stress_label_map.get(stress_level, {'display': stress_level, 'percentage': 50})
             logger.info(f"File analysis successful: {stress_level}")
@@ -158,14 +290,10 @@ def voice_upload():
     except Exception as e:
         logger.error(f"Error in voice_upload: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
-            logger.info(f"Removed temporary file {temp_path}")
 
 @app.route('/api/face/upload', methods=['POST'])
+@requires_models
 def face_upload():
-    temp_path = None
     try:
         if 'file' not in request.files:
             logger.error("No file part in request")
@@ -180,12 +308,9 @@ def face_upload():
             logger.error(f"Invalid file format: {filename}")
             return jsonify({'status': 'error', 'message': 'File must be JPG, JPEG, or PNG format'}), 400
         
-        temp_path = 'temp_image.jpg'
-        file.save(temp_path)
-        logger.info(f"Saved uploaded image to {temp_path}")
-
-        face_detector = StressDetectionModel(img_size=(128, 128))
-        result = face_detector.predict_single_image(temp_path)
+        # Per-request buffer; nothing is written to shared paths
+        image = io.BytesIO(file.read())
+        result = face_detector.predict_single_image(image)
         
         if "error" in result:
             logger.error(f"Error in face prediction: {result['error']}")
@@ -200,10 +325,9 @@ def face_upload():
     except Exception as e:
         logger.error(f"Error in face_upload: {str(e)}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
-            logger.info(f"Removed temporary image file {temp_path}")
+
+threading.Thread(target=load_models, name='model-loader', daemon=True).start()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Safe to serve concurrently: no shared temp files, one shared model wrapper
+    app.run(host='0.0.0.0', port=5000, threaded=True)
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+Registry for stateful streaming sessions (physiological, webcam)
+
+Sessions are created by a factory and dropped after `idle_ttl` seconds
+without an update; each session object keeps an `updated_at` timestamp.
+"""
+
+import threading
+import time
+import uuid
+
+
+class SessionStore:
+    def __init__(self, factory, idle_ttl=3600):
+        self.factory = factory
+        self.idle_ttl = idle_ttl
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def create(self, **kwargs):
+        """Create a session with factory(**kwargs); returns (session_id, session)"""
+        self._expire()
+        session_id = uuid.uuid4().hex
+        session = self.factory(**kwargs)
+        with self._lock:
+            self._sessions[session_id] = session
+        return session_id, session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def delete(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        cutoff = time.time() - self.idle_ttl
+        with self._lock:
+            expired = [session_id for session_id, session in self._sessions.items()
+                       if session.updated_at < cutoff]
+            for session_id in expired:
+                del self._sessions[session_id]
@@ -489,7 +489,16 @@ export default function Dashboard() {
       const data = await response.json();
 
       if (data.status === 'success') {
-        setResult(data);
+        // Inputs the server could not use are left out of the prediction
+        const predictions = data.individual_predictions || {};
+        const skipped = [];
+        if (faceImage && predictions.facial === null) {
+          skipped.push('No face was detected in the image, so it was not used.');
+        }
+        if (voiceFile && predictions.voice === null) {
+          skipped.push('The audio could not be decoded, so it was not used.');
+        }
+        setResult({ ...data, skipped });
       } else {
         setError(data.message || 'Analysis failed');
       }
@@ -666,6 +675,20 @@ export default function Dashboard() {
                 </div>
               )}
 
+              {result.skipped.length > 0 && (
+                <div style={{
+                  background: 'rgba(228, 168, 83, 0.1)',
+                  border: '2px solid #e4a853',
+                  borderRadius: '8px',
+                  padding: '1rem',
+                  marginTop: '1.5rem'
+                }}>
+                  {result.skipped.map((message) => (
+                    <div key={message}>⚠️ {message}</div>
+                  ))}
+                </div>
+              )}
+
               <p style={{
                 background: 'rgba(178, 187, 95, 0.1)',
                 padding: '1rem',
@@ -1,8 +1,11 @@
+import argparse
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras import layers, models, optimizers, callbacks
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from tensorflow.keras.applications import MobileNetV2
 from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
 from sklearn.metrics import classification_report, accuracy_score
@@ -22,75 +25,144 @@ try:
 except:
     print("⚠️ Mixed precision not supported, continuing with default precision")
 
+VALIDATION_SPLIT = 0.2
+SPLIT_SEED = 42
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def build_augmenter(seed=None):
+    """Minimal augmentation for speed, as native TF ops on whole batches
+
+    Rotation up to 5 degrees, shifts up to 5% and horizontal flips, with
+    nearest-pixel fill (the settings the ImageDataGenerator pipeline used).
+    """
+    return models.Sequential([
+        layers.RandomFlip('horizontal', seed=seed, dtype='float32'),
+        layers.RandomRotation(5 / 360.0, fill_mode='nearest', seed=seed, dtype='float32'),
+        layers.RandomTranslation(0.05, 0.05, fill_mode='nearest', seed=seed, dtype='float32'),
+    ])
+
+def list_images(directory):
+    """(paths, labels, class_names) of a class-per-subfolder directory, in sorted order"""
+    class_names = sorted(d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d)))
+    paths, labels = [], []
+    for label, name in enumerate(class_names):
+        for root, _, files in sorted(os.walk(os.path.join(directory, name))):
+            for filename in sorted(files):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    paths.append(os.path.join(root, filename))
+                    labels.append(label)
+    return paths, np.array(labels, dtype=np.float32), class_names
+
+def split_indices(labels, validation_split=VALIDATION_SPLIT, seed=SPLIT_SEED):
+    """Deterministic, stratified train/validation split of shard rows"""
+    rng = np.random.default_rng(seed)
+    train, val = [], []
+    for label in np.unique(labels):
+        rows = rng.permutation(np.flatnonzero(labels == label))
+        n_val = int(round(len(rows) * validation_split))
+        val.extend(rows[:n_val])
+        train.extend(rows[n_val:])
+    return np.sort(np.array(train, dtype=np.int64)), np.sort(np.array(val, dtype=np.int64))
+
 class StressDetectionModel:
     def __init__(self, img_size=(128, 128), batch_size=64):  # Increased batch size
         self.img_size = img_size
         self.batch_size = batch_size
         self.model = None
+        self.head = None
         self.history = None
         self.class_names = ['No Stress', 'Stress']
 
-    def create_data_generators(self, train_dir, test_dir):
-        """Create training, validation, and test datasets using tf.data"""
-        print("🔄 Creating data generators...")
-
-        # Minimal augmentation for speed
-        train_datagen = ImageDataGenerator(
-            rescale=1./255,
-            rotation_range=5,  # Reduced from 10
-            width_shift_range=0.05,  # Reduced from 0.1
-            height_shift_range=0.05,  # Reduced from 0.1
-            horizontal_flip=True,
-            validation_split=0.2
-        )
-
-        val_datagen = ImageDataGenerator(rescale=1./255)
-
-        train_generator = train_datagen.flow_from_directory(
-            train_dir,
-            target_size=self.img_size,
-            batch_size=self.batch_size,
-            class_mode='binary',
-            subset='training',
-            shuffle=True
-        )
-
-        val_generator = train_datagen.flow_from_directory(
-            train_dir,
-            target_size=self.img_size,
-            batch_size=self.batch_size,
-            class_mode='binary',
-            subset='validation',
-            shuffle=True
-        )
-
-        test_generator = val_datagen.flow_from_directory(
-            test_dir,
-            target_size=self.img_size,
-            batch_size=self.batch_size,
-            class_mode='binary',
-            shuffle=False
-        )
-
-        # Convert to tf.data for faster loading
-        def gen_to_tfdata(generator):
-            dataset = tf.data.Dataset.from_generator(
-                lambda: generator,
-                output_types=(tf.float32, tf.float32),
-                output_shapes=([None, *self.img_size, 3], [None])
-            )
-            dataset = dataset.cache().prefetch(tf.data.AUTOTUNE)
-            return dataset
-
-        train_dataset = gen_to_tfdata(train_generator)
-        val_dataset = gen_to_tfdata(val_generator)
-        test_dataset = gen_to_tfdata(test_generator)
-
-        print(f"✅ Training samples: {train_generator.samples}")
-        print(f"✅ Validation samples: {val_generator.samples}")
-        print(f"✅ Test samples: {test_generator.samples}")
-
-        return train_dataset, val_dataset, test_dataset, train_generator, test_generator
+    def _load_image(self, path):
+        # Same decode and resize as inference in server.py
+        with Image.open(path) as img:
+            return np.asarray(img.convert('RGB').resize(self.img_size[::-1]), dtype=np.uint8)
+
+    def build_shards(self, directory, shard_path, workers=8):
+        """One-time conversion of an image directory to resized uint8 arrays
+
+        Writes `<shard_path>.images.npy` (N, H, W, 3), `.labels.npy` and a
+        `.json` manifest of file sizes and mtimes. The shards are reused while
+        the manifest matches. Returns (memory-mapped images, labels).
+        """
+        paths, labels, class_names = list_images(directory)
+        manifest = {
+            'img_size': list(self.img_size),
+            'classes': class_names,
+            'files': [[os.path.relpath(p, directory), os.path.getsize(p), os.path.getmtime(p)] for p in paths],
+        }
+        images_path, labels_path, manifest_path = (shard_path + '.images.npy', shard_path + '.labels.npy',
+                                                  shard_path + '.json')
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f) == manifest:
+                    print(f"♻️ Reusing image shards: {images_path}")
+                    return np.load(images_path, mmap_mode='r'), np.load(labels_path)
+            os.remove(manifest_path)
+
+        print(f"🔄 Converting {len(paths)} images from {directory}...")
+        images = np.lib.format.open_memmap(images_path, mode='w+', dtype=np.uint8,
+                                           shape=(len(paths), *self.img_size, 3))
+        # PIL releases the GIL while decoding and resizing
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i, image in enumerate(pool.map(self._load_image, paths)):
+                images[i] = image
+        images.flush()
+        del images
+
+        np.save(labels_path, labels)
+        # Written last, so an interrupted conversion is redone next time
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        return np.load(images_path, mmap_mode='r'), labels
+
+    def make_dataset(self, images, labels, indices, shuffle=False, augmenter=None, seed=None):
+        """Batches of (float images in [0, 1], labels) for the given shard rows
+
+        Each batch is one sorted fancy-index read from the memory-mapped
+        shards; scaling and augmentation run as parallel native TF ops.
+        """
+        def load(batch):
+            rows = np.sort(batch)
+            return images[rows], labels[rows]
+
+        def to_float(x, y):
+            x = tf.ensure_shape(x, (None, *self.img_size, 3))
+            y = tf.ensure_shape(y, (None,))
+            return tf.cast(x, tf.float32) / 255.0, y
+
+        dataset = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+        if shuffle:
+            dataset = dataset.shuffle(len(indices), seed=seed, reshuffle_each_iteration=True)
+        dataset = dataset.batch(self.batch_size)
+        dataset = dataset.map(lambda batch: tf.numpy_function(load, [batch], (tf.uint8, tf.float32)),
+                              num_parallel_calls=tf.data.AUTOTUNE)
+        dataset = dataset.map(to_float, num_parallel_calls=tf.data.AUTOTUNE)
+        if augmenter is not None:
+            dataset = dataset.map(lambda x, y: (augmenter(x, training=True), y),
+                                  num_parallel_calls=tf.data.AUTOTUNE)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def create_datasets(self, train_dir, test_dir, shard_dir='face_shards'):
+        """Create training, validation, and test datasets using tf.data over preprocessed shards"""
+        print("🔄 Creating datasets...")
+        os.makedirs(shard_dir, exist_ok=True)
+
+        train_images, train_labels = self.build_shards(train_dir, os.path.join(shard_dir, 'train'))
+        test_images, test_labels = self.build_shards(test_dir, os.path.join(shard_dir, 'test'))
+        train_idx, val_idx = split_indices(train_labels)
+
+        train_dataset = self.make_dataset(train_images, train_labels, train_idx, shuffle=True,
+                                          augmenter=build_augmenter(), seed=SPLIT_SEED)
+        val_dataset = self.make_dataset(train_images, train_labels, val_idx)
+        test_dataset = self.make_dataset(test_images, test_labels, np.arange(len(test_labels)))
+
+        print(f"✅ Training samples: {len(train_idx)}")
+        print(f"✅ Validation samples: {len(val_idx)}")
+        print(f"✅ Test samples: {len(test_labels)}")
+
+        return train_dataset, val_dataset, test_dataset, test_labels
 
     def build_model(self):
         """Use MobileNetV2 for faster training and better accuracy"""
@@ -118,7 +190,129 @@ class StressDetectionModel:
         print("✅ Model built successfully!")
         return model
 
-    def train_model(self, train_dataset, val_dataset, train_generator, epochs=10):  # Reduced epochs
+    # -----------------------------
+    # Cached bottleneck training
+    # -----------------------------
+    def build_backbone(self):
+        """Frozen MobileNetV2 + global pooling: image batch -> pooled embeddings"""
+        base_model = MobileNetV2(input_shape=(*self.img_size, 3), include_top=False, weights='imagenet')
+        base_model.trainable = False
+        return models.Sequential([base_model, layers.GlobalAveragePooling2D()])
+
+    def cache_embeddings(self, shard_path, indices, cache_path, augmentations=0, backbone=None):
+        """Run the frozen backbone once over shard rows and store the embeddings
+
+        Pass 0 covers the plain images; passes 1..augmentations apply the
+        training augmentation with fixed seeds, so the cached set is
+        reproducible. Embeddings go to a memory-mapped `<cache_path>.npy` and
+        are reused while the shards, rows and augmentation count are unchanged.
+        Returns (embeddings, labels).
+        """
+        images = np.load(shard_path + '.images.npy', mmap_mode='r')
+        labels = np.load(shard_path + '.labels.npy')
+        with open(shard_path + '.json') as f:
+            shards = json.load(f)
+        indices = np.asarray(indices, dtype=np.int64)
+        manifest = {
+            'shards': shards,
+            'rows': hashlib.sha1(indices.tobytes()).hexdigest(),
+            'augmentations': augmentations,
+        }
+        embeddings_path, labels_path, manifest_path = (cache_path + '.npy', cache_path + '.labels.npy',
+                                                      cache_path + '.json')
+
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                if json.load(f) == manifest:
+                    print(f"♻️ Reusing cached embeddings: {embeddings_path}")
+                    return np.load(embeddings_path, mmap_mode='r'), np.load(labels_path)
+            os.remove(manifest_path)
+
+        backbone = backbone or self.build_backbone()
+        n = len(indices)
+        passes = augmentations + 1
+        embeddings = np.lib.format.open_memmap(
+            embeddings_path, mode='w+', dtype=np.float32,
+            shape=(n * passes, backbone.output_shape[-1])
+        )
+        print(f"🔄 Computing {n * passes} embeddings ({n} images x {passes} passes)...")
+        for k in range(passes):
+            augmenter = build_augmenter(seed=k) if k else None
+            row = k * n
+            for batch, _ in self.make_dataset(images, labels, indices, augmenter=augmenter):
+                embeddings[row:row + len(batch)] = np.asarray(backbone.predict_on_batch(batch), dtype=np.float32)
+                row += len(batch)
+        embeddings.flush()
+        del embeddings
+
+        cached_labels = np.tile(labels[indices], passes)
+        np.save(labels_path, cached_labels)
+        # Written last, so an interrupted build is recomputed next time
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        return np.load(embeddings_path, mmap_mode='r'), cached_labels
+
+    def build_head(self, input_dim):
+        """The dense head of build_model, on its own"""
+        head = models.Sequential([
+            layers.Input(shape=(input_dim,)),
+            layers.Dense(128, activation='relu'),
+            layers.Dropout(0.3),
+            layers.Dense(1, activation='sigmoid', dtype='float32')
+        ])
+        head.compile(
+            optimizer=optimizers.Adam(learning_rate=0.001),
+            loss='binary_crossentropy',
+            metrics=['accuracy']
+        )
+        return head
+
+    def train_head(self, train_embeddings, train_labels, val_embeddings, val_labels, epochs=30):
+        """Train the dense head on cached embeddings, then assemble the full model
+
+        The head's weights are copied into the build_model architecture, so
+        the saved .h5 is the same kind of model server.py already loads.
+        """
+        print("🚀 Training head on cached embeddings...")
+        head = self.build_head(train_embeddings.shape[1])
+        cb = [
+            callbacks.EarlyStopping(monitor='val_loss', patience=5, restore_best_weights=True),
+            callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=2, min_lr=1e-5)
+        ]
+        self.history = head.fit(
+            train_embeddings, train_labels,
+            batch_size=self.batch_size,
+            epochs=epochs,
+            validation_data=(val_embeddings, val_labels),
+            shuffle=True,
+            callbacks=cb,
+            verbose=1
+        )
+        self.head = head
+
+        self.build_model()
+        target_layers = [layer for layer in self.model.layers if isinstance(layer, layers.Dense)]
+        source_layers = [layer for layer in head.layers if isinstance(layer, layers.Dense)]
+        for target, source in zip(target_layers, source_layers):
+            target.set_weights(source.get_weights())
+
+        print("✅ Training completed!")
+        return self.history
+
+    def evaluate_embeddings(self, test_embeddings, test_labels):
+        """Evaluate the trained head on cached test embeddings"""
+        print("📊 Evaluating model on test data...")
+        predictions = self.head.predict(test_embeddings, batch_size=self.batch_size)
+        predicted_classes = (predictions > 0.5).astype(int).flatten()
+        true_classes = test_labels.astype(int)
+
+        accuracy = accuracy_score(true_classes, predicted_classes)
+        print(f"\n✅ Test Accuracy: {accuracy:.4f}")
+        print("\nClassification Report:")
+        print(classification_report(true_classes, predicted_classes, target_names=self.class_names))
+        return accuracy
+
+    def train_model(self, train_dataset, val_dataset, epochs=10):  # Reduced epochs
         """Train model with early stopping"""
         print("🚀 Starting model training...")
 
@@ -129,10 +323,8 @@ class StressDetectionModel:
 
         self.history = self.model.fit(
             train_dataset,
-            steps_per_epoch=train_generator.samples // self.batch_size,
             epochs=epochs,
             validation_data=val_dataset,
-            validation_steps=train_generator.samples // self.batch_size // 5,
             callbacks=cb,
             verbose=1
         )
@@ -140,12 +332,12 @@ class StressDetectionModel:
         print("✅ Training completed!")
         return self.history
 
-    def evaluate_model(self, test_dataset, test_generator):
+    def evaluate_model(self, test_dataset, test_labels):
         """Evaluate trained model"""
         print("📊 Evaluating model on test data...")
         predictions = self.model.predict(test_dataset)
         predicted_classes = (predictions > 0.5).astype(int).flatten()
-        true_classes = test_generator.classes
+        true_classes = test_labels.astype(int)
 
         accuracy = accuracy_score(true_classes, predicted_classes)
         print(f"\n✅ Test Accuracy: {accuracy:.4f}")
@@ -183,28 +375,62 @@ class StressDetectionModel:
 # -----------------------------
 # 🚀 MAIN TRAINING FUNCTION
 # -----------------------------
-def train_model():
+# Update these paths as per your folder structure
+TRAIN_DIR = r"D:/stress/stress-detection/src/facesData/train"
+TEST_DIR = r"D:/stress/stress-detection/src/facesData/test"
+
+def train_model(train_dir=TRAIN_DIR, test_dir=TEST_DIR, shard_dir='face_shards'):
     print("🎯 Starting Stress Detection Model...")
 
     # Initialize model
     stress_model = StressDetectionModel(img_size=(128, 128), batch_size=64)
 
-    # Update these paths as per your folder structure
-    train_dir = r"D:/stress/stress-detection/src/facesData/train"
-    test_dir = r"D:/stress/stress-detection/src/facesData/test"
-
     if not os.path.exists(train_dir) or not os.path.exists(test_dir):
         print("❌ Dataset directories not found!")
         print(f"Expected paths:\n{train_dir}\n{test_dir}")
         return None
 
-    # Create data generators
-    train_dataset, val_dataset, test_dataset, train_gen, test_gen = stress_model.create_data_generators(train_dir, test_dir)
+    # Create datasets (images are converted to shards on the first run)
+    train_dataset, val_dataset, test_dataset, test_labels = stress_model.create_datasets(train_dir, test_dir, shard_dir)
 
     # Build, train and evaluate
     stress_model.build_model()
-    stress_model.train_model(train_dataset, val_dataset, train_gen, epochs=10)
-    stress_model.evaluate_model(test_dataset, test_gen)
+    stress_model.train_model(train_dataset, val_dataset, epochs=10)
+    stress_model.evaluate_model(test_dataset, test_labels)
+    stress_model.save_model("final_stress_detection_model.h5")
+
+    print("\n🏁 All steps completed successfully!")
+    return stress_model
+
+def train_model_cached(train_dir, test_dir, augmentations=2, cache_dir='embedding_cache',
+                       shard_dir='face_shards', epochs=30):
+    """Train only the dense head on backbone embeddings computed once and cached"""
+    print("🎯 Starting Stress Detection Model (cached embeddings)...")
+
+    stress_model = StressDetectionModel(img_size=(128, 128), batch_size=64)
+
+    if not os.path.exists(train_dir) or not os.path.exists(test_dir):
+        print("❌ Dataset directories not found!")
+        print(f"Expected paths:\n{train_dir}\n{test_dir}")
+        return None
+
+    os.makedirs(cache_dir, exist_ok=True)
+    os.makedirs(shard_dir, exist_ok=True)
+    train_shards, test_shards = os.path.join(shard_dir, 'train'), os.path.join(shard_dir, 'test')
+    _, train_labels = stress_model.build_shards(train_dir, train_shards)
+    _, test_labels = stress_model.build_shards(test_dir, test_shards)
+    train_idx, val_idx = split_indices(train_labels)
+
+    backbone = stress_model.build_backbone()
+    train_x, train_y = stress_model.cache_embeddings(train_shards, train_idx, os.path.join(cache_dir, 'train'),
+                                                     augmentations=augmentations, backbone=backbone)
+    val_x, val_y = stress_model.cache_embeddings(train_shards, val_idx, os.path.join(cache_dir, 'val'),
+                                                 backbone=backbone)
+    test_x, test_y = stress_model.cache_embeddings(test_shards, np.arange(len(test_labels)),
+                                                   os.path.join(cache_dir, 'test'), backbone=backbone)
+
+    stress_model.train_head(train_x, train_y, val_x, val_y, epochs=epochs)
+    stress_model.evaluate_embeddings(test_x, test_y)
     stress_model.save_model("final_stress_detection_model.h5")
 
     print("\n🏁 All steps completed successfully!")
@@ -214,4 +440,20 @@ def train_model():
 # 🏃 MAIN EXECUTION
 # -----------------------------
 if __name__ == "__main__":
-    model = train_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the MobileNetV2 face stress model")
+    parser.add_argument('--cached', action='store_true',
+                        help="train the head on cached backbone embeddings (backbone runs once)")
+    parser.add_argument('--augmentations', type=int, default=2,
+                        help="augmented passes cached per training image (with --cached)")
+    parser.add_argument('--cache-dir', default='embedding_cache')
+    parser.add_argument('--shard-dir', default='face_shards',
+                        help="where the resized uint8 image shards are kept between runs")
+    parser.add_argument('--train-dir', default=TRAIN_DIR)
+    parser.add_argument('--test-dir', default=TEST_DIR)
+    args = parser.parse_args()
+
+    if args.cached:
+        model = train_model_cached(args.train_dir, args.test_dir, args.augmentations, args.cache_dir,
+                                   args.shard_dir)
+    else:
+        model = train_model(args.train_dir, args.test_dir, args.shard_dir)
\ No newline at end of file
@@ -0,0 +1,22 @@
+import pytest
+
+from model import split_core_budget
+
+NAMES = ('facial', 'voice', 'physiological')
+
+
+def test_budget_is_split_evenly():
+    assert split_core_budget(8, names=NAMES) == {'facial': 3, 'voice': 3, 'physiological': 2}
+    assert split_core_budget(8, {'physiological': 4}, NAMES) == {'physiological': 4, 'facial': 2, 'voice': 2}
+
+
+def test_small_budget_gives_one_core_each():
+    # train() then fits at most n_jobs models at a time
+    assert split_core_budget(2, names=NAMES) == {'facial': 1, 'voice': 1, 'physiological': 1}
+
+
+def test_pinned_share_must_leave_a_core_per_model():
+    with pytest.raises(ValueError):
+        split_core_budget(4, {'physiological': 3}, NAMES)
+    with pytest.raises(ValueError):
+        split_core_budget(4, {'physiological': 5}, NAMES)
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+import model_artifact
+from forest_engine import CompiledForest
+
+
+def fitted_forest(n_samples=300, n_features=12, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(5.0, 3.0, (n_samples, n_features))
+    y = (X[:, 0] + 0.5 * X[:, 3] + rng.normal(0, 1, n_samples) > 7.5).astype(int)
+    scaler = StandardScaler().fit(X)
+    clf = RandomForestClassifier(n_estimators=15, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    X_test = rng.normal(5.0, 3.0, (200, n_features))
+    return clf, scaler, X_test
+
+
+def test_compiled_forest_matches_sklearn():
+    clf, scaler, X = fitted_forest()
+    engine = CompiledForest.compile(clf, scaler)
+    expected = clf.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(engine.predict_proba(X), expected, atol=1e-9)
+    np.testing.assert_array_equal(engine.predict(X), clf.predict(scaler.transform(X)))
+
+
+def test_compiled_forest_rejects_wrong_width():
+    clf, scaler, X = fitted_forest(n_features=12)
+    engine = CompiledForest.compile(clf, scaler)
+    with pytest.raises(ValueError):
+        engine.predict_proba(np.zeros((1, 84)))
+    with pytest.raises(ValueError):
+        engine.apply(X[:, :6])
+
+
+def test_artifact_round_trip(tmp_path):
+    clf, scaler, X = fitted_forest()
+    detector = SimpleNamespace(facial_model=clf, facial_scaler=scaler,
+                               voice_model=None, voice_scaler=None,
+                               phys_model=None, phys_scaler=None, is_trained=True)
+    path = str(tmp_path / 'model.msd')
+    model_artifact.save_artifact(detector, path)
+    assert model_artifact.is_artifact(path)
+
+    loaded = SimpleNamespace(engines={})
+    model_artifact.load_artifact(loaded, path)
+    expected = clf.predict_proba(scaler.transform(X))
+
+    # ArrayForest over the mapped node arrays
+    forest, array_scaler = loaded.facial_model, loaded.facial_scaler
+    np.testing.assert_allclose(forest.predict_proba(array_scaler.transform(X)), expected, atol=1e-9)
+    assert loaded.voice_model is None and loaded.phys_model is None
+
+    # The compiled engine is built from views of the read-only mapping, not copies
+    engine = loaded.engines['facial']
+    np.testing.assert_allclose(engine.predict_proba(X), expected, atol=1e-9)
+    assert engine.feature.dtype == np.int32
+    for array in engine.arrays().values():
+        assert not array.flags.writeable
+    with pytest.raises(ValueError):
+        engine.predict_proba(X[:, :5])
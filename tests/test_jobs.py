@@ -0,0 +1,25 @@
+import threading
+
+import pytest
+
+from jobs import DONE, JobManager, QueueFull
+
+
+def test_submit_rejects_jobs_beyond_max_pending():
+    release = threading.Event()
+    manager = JobManager(max_workers=1, max_pending=2)
+    try:
+        first = manager.submit(release.wait)
+        manager.submit(release.wait)
+        with pytest.raises(QueueFull):
+            manager.submit(release.wait)
+        release.set()
+        assert manager.get(first, timeout=5)['status'] == DONE
+    finally:
+        release.set()
+        manager.shutdown()
+    # Finished jobs free their slots
+    manager = JobManager(max_workers=1, max_pending=1)
+    for _ in range(3):
+        assert manager.get(manager.submit(lambda: 1), timeout=5)['result'] == 1
+    manager.shutdown()
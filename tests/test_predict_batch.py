@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('sklearn')
+
+from model import MultimodalStressDetector
+
+
+@pytest.fixture(scope='module')
+def detector():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 120)
+    detector = MultimodalStressDetector()
+    detector.train(rng.normal(y[:, None], 1.0, (120, 84)), rng.normal(y[:, None], 1.0, (120, 140)),
+                   rng.normal(y[:, None], 1.0, (120, 132)), y, n_jobs=1)
+    return detector
+
+
+def test_untrained_returns_one_error_per_row():
+    rows = MultimodalStressDetector().predict_batch(facial=np.zeros((3, 84)), as_dicts=True)
+    assert rows == [{'error': 'Model not trained'}] * 3
+
+
+def test_mismatched_rows_are_rejected(detector):
+    with pytest.raises(ValueError):
+        detector.predict_batch(facial=np.zeros((3, 84)), voice=np.zeros((2, 140)))
+    with pytest.raises(ValueError):
+        detector.predict_batch(facial=np.zeros((3, 84)), masks={'facial': [True, False]})
+    with pytest.raises(ValueError):
+        detector.predict_batch(facial=np.zeros((3, 84)), fusion='median')
+
+
+def test_fusion_rules(detector):
+    rng = np.random.default_rng(1)
+    facial, voice = rng.normal(0.5, 1.0, (10, 84)), rng.normal(0.5, 1.0, (10, 140))
+    facial[0] = np.nan
+    results = {rule: detector.predict_batch(facial=facial, voice=voice, fusion=rule)
+               for rule in ('average', 'max', 'product')}
+    individual = np.vstack([results['average']['individual_predictions'][name] for name in ('facial', 'voice')])
+    np.testing.assert_allclose(results['average']['stress_probability'], np.nanmean(individual, axis=0))
+    np.testing.assert_allclose(results['max']['stress_probability'], np.nanmax(individual, axis=0))
+    # One modality left: every rule reduces to its probability
+    for result in results.values():
+        assert result['n_modalities'][0] == 1
+        assert result['stress_probability'][0] == pytest.approx(individual[1, 0])
+    p, q = individual[:, 1]
+    assert results['product']['stress_probability'][1] == pytest.approx(p * q / (p * q + (1 - p) * (1 - q)))
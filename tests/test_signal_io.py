@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+import signal_io
+
+
+def test_decode_text():
+    np.testing.assert_array_equal(signal_io.decode_text('1, 2.5,-3,\n'), [1.0, 2.5, -3.0])
+    assert signal_io.decode_text('').size == 0
+    with pytest.raises(ValueError, match='eeg_data'):
+        signal_io.decode_text('1,two,3', 'eeg_data')
+
+
+def test_decode_interleaved_splits_channels():
+    frames = np.arange(6, dtype='<f4').reshape(3, 2)
+    signals = signal_io.decode_interleaved(frames.tobytes(), ['eeg', 'gsr'])
+    np.testing.assert_array_equal(signals['eeg'], [0, 2, 4])
+    np.testing.assert_array_equal(signals['gsr'], [1, 3, 5])
+    with pytest.raises(ValueError):
+        signal_io.decode_interleaved(frames.tobytes()[:-4], ['eeg', 'gsr'])
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+
+from tflite_backend import TFLiteModel, compare, export_tflite
+
+
+@pytest.fixture(scope='module')
+def exported_model(tmp_path_factory):
+    """A small conv net like the face model, saved as .h5 and exported to .tflite"""
+    directory = tmp_path_factory.mktemp('tflite')
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(16, 16, 3)),
+        tf.keras.layers.Conv2D(4, 3, activation='relu'),
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(1, activation='sigmoid'),
+    ])
+    h5_path = str(directory / 'model.h5')
+    model.save(h5_path)
+    tflite_path = export_tflite(h5_path)
+    held_out = np.random.default_rng(1).random((24, 16, 16, 3), dtype=np.float32)
+    samples_path = str(directory / 'held_out.npy')
+    np.save(samples_path, held_out)
+    return model, h5_path, tflite_path, held_out, samples_path
+
+
+def test_tflite_matches_keras_on_held_out_samples(exported_model):
+    model, _, tflite_path, held_out, _ = exported_model
+    expected = model.predict(held_out, verbose=0)
+    np.testing.assert_allclose(TFLiteModel(tflite_path).predict(held_out), expected, atol=1e-5)
+
+
+def test_padded_batches_match_single_samples(exported_model):
+    _, _, tflite_path, held_out, _ = exported_model
+    tflite_model = TFLiteModel(tflite_path, batch_sizes=(1, 4, 16))
+    single = np.concatenate([tflite_model.predict(sample[np.newaxis]) for sample in held_out])
+    for n in (1, 3, 4, 7, 16, 24):
+        np.testing.assert_allclose(tflite_model.predict(held_out[:n]), single[:n], atol=1e-6)
+    # One interpreter per bucket, none for sizes that were never requested
+    assert sorted(tflite_model._interpreters) == [1, 4, 16]
+
+
+def test_compare_reports_parity(exported_model):
+    _, h5_path, tflite_path, _, samples_path = exported_model
+    report = compare(h5_path, tflite_path, samples_path)
+    assert report['max_abs_diff'] < 1e-5
+    assert report['label_agreement'] == 1.0
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+librosa = pytest.importorskip('librosa')
+
+from voice_features import N_VOICE_FEATURES, VoiceFeatureEngine, reference_features
+
+
+def synthetic_clip(sr=22050, seconds=4.0):
+    """Voiced tones with a pulse train, so tempo and chroma are non-trivial"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(sr * seconds)) / sr
+    y = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 330 * t * (1 + 0.05 * t))
+    y[(t % 0.5) < 0.02] += 0.5
+    y += 0.01 * rng.standard_normal(len(t))
+    return y.astype(np.float32), sr
+
+
+def test_engine_matches_reference_pipeline():
+    y, sr = synthetic_clip()
+    engine = VoiceFeatureEngine().extract(y, sr)
+    reference = reference_features(y, sr)
+    assert engine.shape == (N_VOICE_FEATURES,)
+    np.testing.assert_allclose(engine, reference, rtol=1e-4, atol=1e-6)
+
+
+def test_engine_reuses_filterbanks_across_clips():
+    engine = VoiceFeatureEngine()
+    y, sr = synthetic_clip(seconds=2.0)
+    first = engine.extract(y, sr)
+    np.testing.assert_allclose(engine.extract(y, sr), first)
+    assert set(engine._mel_bases) == {(sr, 128), (sr, 8)}
@@ -0,0 +1,230 @@
+"""
+Lightweight CPU inference backend for the Keras face and voice models
+
+`export` converts an .h5 model to a TFLite flatbuffer, optionally with
+post-training quantization:
+    none     float32 weights
+    dynamic  int8 weights, float activations
+    float16  float16 weights
+    int8     int8 weights and activations, calibrated on representative
+             samples (float32 input/output are kept)
+
+TFLiteModel exposes the same `predict(batch)` call as a Keras model, so it can
+be dropped into server.py and voice.py. It uses the standalone tflite_runtime
+package when installed (no full TensorFlow import), otherwise tf.lite.
+
+Usage:
+    python tflite_backend.py export final_stress_detection_model.h5 --quantize float16
+    python tflite_backend.py compare final_stress_detection_model.h5 \
+        final_stress_detection_model.tflite --samples held_out_faces.npy
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from resource_usage import peak_rss_mb
+
+BACKENDS = ('keras', 'tflite')
+QUANTIZATION_MODES = ('none', 'dynamic', 'float16', 'int8')
+# Interpreter batch sizes; micro-batches are padded up to the next one
+DEFAULT_BATCH_SIZES = (1, 4, 16)
+
+
+def _interpreter_class():
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """Keras-style `predict` over TFLite interpreters
+
+    Batches are zero-padded up to the next of `batch_sizes`, each served by an
+    interpreter allocated once for that size, so changing micro-batch sizes
+    never resize tensors or re-run allocate_tensors. Larger inputs run in
+    chunks of the largest size.
+    """
+
+    def __init__(self, model_path, num_threads=None, batch_sizes=DEFAULT_BATCH_SIZES):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.batch_sizes = tuple(sorted(batch_sizes))
+        self._interpreters = {}
+        # Tensor indices are the same in every interpreter of the model
+        interpreter = self._interpreter(self.batch_sizes[0])
+        self._input = interpreter.get_input_details()[0]
+        self._output = interpreter.get_output_details()[0]
+        # An interpreter must not be invoked from two threads at once
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self):
+        return tuple(self._input['shape_signature'])
+
+    def _interpreter(self, batch_size):
+        """Interpreter allocated for `batch_size` rows, created on first use"""
+        interpreter = self._interpreters.get(batch_size)
+        if interpreter is None:
+            interpreter = _interpreter_class()(model_path=self.model_path, num_threads=self.num_threads)
+            details = interpreter.get_input_details()[0]
+            interpreter.resize_tensor_input(details['index'], [batch_size, *details['shape'][1:]])
+            interpreter.allocate_tensors()
+            self._interpreters[batch_size] = interpreter
+        return interpreter
+
+    def _run(self, x):
+        n = len(x)
+        size = next(size for size in self.batch_sizes if size >= n)
+        if n < size:
+            x = np.concatenate([x, np.zeros((size - n, *x.shape[1:]), dtype=x.dtype)])
+        interpreter = self._interpreter(size)
+        interpreter.set_tensor(self._input['index'], x)
+        interpreter.invoke()
+        return interpreter.get_tensor(self._output['index'])[:n].copy()
+
+    def predict(self, x, **kwargs):
+        x = np.asarray(x, dtype=np.float32)
+        largest = self.batch_sizes[-1]
+        with self._lock:
+            return np.concatenate([self._run(x[i:i + largest]) for i in range(0, max(len(x), 1), largest)])
+
+
+def tflite_path_for(model_path):
+    return os.path.splitext(model_path)[0] + '.tflite'
+
+
+def load_inference_model(model_path, backend='keras', num_threads=None):
+    """Load a model for inference with the chosen backend
+
+    For 'tflite', `model_path` may name the .h5 model; its .tflite sibling
+    (produced by `export`) is loaded instead.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' (expected one of {BACKENDS})")
+    if backend == 'tflite':
+        path = model_path if model_path.endswith('.tflite') else tflite_path_for(model_path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"TFLite model not found: {path} (run tflite_backend.py export first)")
+        return TFLiteModel(path, num_threads=num_threads)
+    from tensorflow.keras.models import load_model
+    return load_model(model_path)
+
+
+def export_tflite(model_path, output_path=None, quantize='none', representative_data=None):
+    """Convert an .h5 Keras model to TFLite; returns the output path"""
+    import tensorflow as tf
+
+    if quantize not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization '{quantize}' (expected one of {QUANTIZATION_MODES})")
+    output_path = output_path or tflite_path_for(model_path)
+
+    model = tf.keras.models.load_model(model_path, compile=False)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize != 'none':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantize == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == 'int8':
+        if representative_data is None:
+            raise ValueError("int8 quantization needs representative samples (--samples)")
+        converter.representative_dataset = lambda: ([sample[np.newaxis].astype(np.float32)]
+                                                    for sample in representative_data[:200])
+
+    with open(output_path, 'wb') as f:
+        f.write(converter.convert())
+    return output_path
+
+
+def benchmark(model_path, backend, samples, repeats=50):
+    """Load one backend and time single-sample inference
+
+    Returns (predictions, report). Run each backend in its own process to get
+    meaningful load time and peak RSS figures.
+    """
+    start = time.perf_counter()
+    model = load_inference_model(model_path, backend)
+    load_s = time.perf_counter() - start
+
+    predictions = np.concatenate([model.predict(sample[np.newaxis]) for sample in samples])
+    timings = []
+    for i in range(repeats):
+        sample = samples[i % len(samples)][np.newaxis]
+        start = time.perf_counter()
+        model.predict(sample)
+        timings.append(time.perf_counter() - start)
+
+    return predictions, {
+        'backend': backend,
+        'load_s': load_s,
+        'latency_ms_p50': float(np.percentile(timings, 50) * 1000),
+        'latency_ms_p95': float(np.percentile(timings, 95) * 1000),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(keras_path, tflite_path, samples_path):
+    """Parity and latency/memory comparison, each backend in a fresh process"""
+    outputs = {}
+    for backend, path in (('keras', keras_path), ('tflite', tflite_path)):
+        result = subprocess.run(
+            [sys.executable, __file__, '_bench', path, backend, samples_path],
+            check=True, capture_output=True, text=True)
+        outputs[backend] = json.loads(result.stdout.strip().splitlines()[-1])
+
+    keras_pred = np.asarray(outputs['keras'].pop('predictions'))
+    tflite_pred = np.asarray(outputs['tflite'].pop('predictions'))
+    if keras_pred.shape[1] == 1:
+        agreement = np.mean((keras_pred[:, 0] > 0.5) == (tflite_pred[:, 0] > 0.5))
+    else:
+        agreement = np.mean(np.argmax(keras_pred, axis=1) == np.argmax(tflite_pred, axis=1))
+    return {
+        'max_abs_diff': float(np.max(np.abs(keras_pred - tflite_pred))),
+        'label_agreement': float(agreement),
+        'keras': outputs['keras'],
+        'tflite': outputs['tflite'],
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 5 and sys.argv[1] == '_bench':
+        # Internal: one backend per process, result as a JSON line on stdout
+        _, _, path, backend, samples_path = sys.argv
+        predictions, report = benchmark(path, backend, np.load(samples_path))
+        report['predictions'] = predictions.tolist()
+        print(json.dumps(report))
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="TFLite export and comparison for the stress models")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_cmd = commands.add_parser('export', help="Convert an .h5 model to .tflite")
+    export_cmd.add_argument('model')
+    export_cmd.add_argument('--output')
+    export_cmd.add_argument('--quantize', choices=QUANTIZATION_MODES, default='none')
+    export_cmd.add_argument('--samples', help=".npy array of preprocessed inputs for int8 calibration")
+
+    compare_cmd = commands.add_parser('compare', help="Parity and latency/memory: Keras vs TFLite")
+    compare_cmd.add_argument('keras_model')
+    compare_cmd.add_argument('tflite_model')
+    compare_cmd.add_argument('--samples', required=True, help=".npy array of held-out preprocessed inputs")
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        samples = np.load(args.samples) if args.samples else None
+        path = export_tflite(args.model, args.output, args.quantize, samples)
+        print(f"TFLite model saved to {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    else:
+        report = compare(args.keras_model, args.tflite_model, args.samples)
+        print(f"Max abs diff: {report['max_abs_diff']:.2e}  label agreement: {report['label_agreement']:.2%}")
+        for backend in BACKENDS:
+            r = report[backend]
+            print(f"{backend:>7}: load {r['load_s']:.2f}s  p50 {r['latency_ms_p50']:.2f}ms  "
+                  f"p95 {r['latency_ms_p95']:.2f}ms  peak RSS {r['peak_rss_mb']:.0f}MB")
@@ -1,5 +1,7 @@
 from voice import train_model
 import numpy as np
 
-model, label_encoder = train_model()
-np.save('label_encoder_classes.npy', label_encoder.classes_)
\ No newline at end of file
+# The guard keeps spawned MFCC extraction workers from re-running training
+if __name__ == '__main__':
+    model, label_encoder = train_model()
+    np.save('label_encoder_classes.npy', label_encoder.classes_)
@@ -3,90 +3,133 @@ Training script for the Multimodal Stress Detection Model
 This script trains the model using your dataset structure from the Jupyter notebook
 """
 
+import argparse
+import json
+import os
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from imblearn.over_sampling import SMOTE
 from model import MultimodalStressDetector
-import os
 
-def load_dataset():
+# Dataset locations (update to your dataset layout)
+LABELS_PATH = 'Dataset/labels.csv'
+PHYS_FEATURES_PATH = 'Feature Extraction/Features/all_physiological_features.csv'
+VIDEO_FEATURES_PATH = 'Feature Extraction/Features/video11tasks_aus_gaze_mean_std.csv'
+AUDIO_FEATURES_PATH = 'Feature Extraction/Features/HCfeatures.csv'
+
+# Aligned float32 copy of the CSVs above, rebuilt when any of them changes
+FEATURE_STORE_PATH = 'Dataset/feature_store.npz'
+FEATURE_STORE_VERSION = 1
+
+TRAINING_REPORT_PATH = 'training_report.json'
+
+def _source_signature():
+    """Size and mtime of every source file, or None if one is missing"""
+    signature = {'version': FEATURE_STORE_VERSION}
+    for name, path in (('labels', LABELS_PATH), ('phys', PHYS_FEATURES_PATH),
+                       ('video', VIDEO_FEATURES_PATH), ('audio', AUDIO_FEATURES_PATH)):
+        if not os.path.exists(path):
+            print(f"Error: {name} file not found at {path}")
+            print("Please update the path in train_model.py")
+            return None
+        stat = os.stat(path)
+        signature[name] = [path, stat.st_size, stat.st_mtime]
+    return signature
+
+def build_feature_store(store_path=FEATURE_STORE_PATH, signature=None):
     """
-    Load the dataset based on your existing structure
-    Modify the paths according to your dataset location
+    Parse the label and feature CSVs once and save them as an aligned store:
+    the joined sample index, float32 phys/video/audio matrices, their column
+    names, the binary-stress labels and the source signature.
+    Returns True on success.
     """
-    print("Loading dataset...")
-    
-    # Load labels
-    labels_path = 'Dataset/labels.csv'  # Update this path
-    if not os.path.exists(labels_path):
-        print(f"Error: Labels file not found at {labels_path}")
-        print("Please update the path in train_model.py")
-        return None, None, None, None
-    
-    labels = pd.read_csv(labels_path, sep=",", header=0, index_col=0).dropna()
+    signature = signature or _source_signature()
+    if signature is None:
+        return False
+
+    print("Building feature store from CSV files...")
+    labels = pd.read_csv(LABELS_PATH, sep=",", header=0, index_col=0).dropna()
     print(f"Loaded {len(labels)} labels")
-    
-    # Load features for each modality
-    phys_features_path = 'Feature Extraction/Features/all_physiological_features.csv'
-    video_features_path = 'Feature Extraction/Features/video11tasks_aus_gaze_mean_std.csv'
-    audio_features_path = 'Feature Extraction/Features/HCfeatures.csv'
-    
-    # Check if files exist
-    if not os.path.exists(phys_features_path):
-        print(f"Error: Physiological features not found at {phys_features_path}")
-        return None, None, None, None
-    if not os.path.exists(video_features_path):
-        print(f"Error: Video features not found at {video_features_path}")
-        return None, None, None, None
-    if not os.path.exists(audio_features_path):
-        print(f"Error: Audio features not found at {audio_features_path}")
-        return None, None, None, None
-    
-    print("Loading feature files...")
-    x_phys = pd.read_csv(phys_features_path, sep=",", header=0, index_col=0)
+
+    x_phys = pd.read_csv(PHYS_FEATURES_PATH, sep=",", header=0, index_col=0)
     print(f"Loaded {len(x_phys)} physiological samples")
-    
-    x_video = pd.read_csv(video_features_path, sep=",", header=0, index_col=0)
+
+    x_video = pd.read_csv(VIDEO_FEATURES_PATH, sep=",", header=0, index_col=0)
     print(f"Loaded {len(x_video)} video samples")
-    
-    x_audio = pd.read_csv(audio_features_path, sep=",", header=None, index_col=0)
+
+    x_audio = pd.read_csv(AUDIO_FEATURES_PATH, sep=",", header=None, index_col=0)
     print(f"Loaded {len(x_audio)} audio samples")
-    
-    # Process audio features if needed (from your notebook)
-    # Fixed: Use assignment instead of inplace
-    x_audio.index = [i.split('.')[0] for i in list(x_audio.index)]
-    
+
+    # Audio rows are keyed by file name; strip the extension to get the task id
+    x_audio.index = x_audio.index.astype(str).str.split('.').str[0]
+
     # Get common indices (tasks with all 3 modalities)
-    common_idx = list(x_phys.index.intersection(x_video.index).intersection(x_audio.index).intersection(labels.index))
-    
+    common_idx = x_phys.index.intersection(x_video.index).intersection(x_audio.index).intersection(labels.index)
+
     print(f"\nFound {len(common_idx)} samples with all 3 modalities")
-    
+
     if len(common_idx) == 0:
         print("Error: No common samples found across all modalities!")
         print(f"Phys samples: {len(x_phys)}")
         print(f"Video samples: {len(x_video)}")
         print(f"Audio samples: {len(x_audio)}")
         print(f"Label samples: {len(labels)}")
+        return False
+
+    arrays = {
+        'index': common_idx.astype(str).to_numpy(dtype=str),
+        'y': labels.loc[common_idx, 'binary-stress'].to_numpy().astype(np.int64),
+        'signature': np.array(json.dumps(signature)),
+    }
+    for name, frame in (('phys', x_phys), ('video', x_video), ('audio', x_audio)):
+        arrays[name] = frame.loc[common_idx].to_numpy(dtype=np.float32)
+        arrays[name + '_columns'] = frame.columns.astype(str).to_numpy(dtype=str)
+
+    # Write then rename so an interrupted build never leaves a partial store
+    store_dir = os.path.dirname(store_path)
+    if store_dir:
+        os.makedirs(store_dir, exist_ok=True)
+    tmp_path = store_path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, store_path)
+    print(f"Feature store saved to {store_path}")
+    return True
+
+def load_dataset(store_path=FEATURE_STORE_PATH, rebuild=False):
+    """
+    Load (X_phys, X_video, X_audio, y) from the feature store, building it
+    first if it is missing or any source CSV has changed since it was built
+    """
+    signature = _source_signature()
+    if signature is None:
         return None, None, None, None
-    
-    # Filter to common indices
-    x_phys = x_phys.loc[common_idx]
-    x_video = x_video.loc[common_idx]
-    x_audio = x_audio.loc[common_idx]
-    y = labels.loc[common_idx]['binary-stress']
-    
-    print(f"Class distribution: {y.value_counts().to_dict()}")
+
+    stored = None
+    if not rebuild and os.path.exists(store_path):
+        with np.load(store_path, allow_pickle=False) as store:
+            stored = json.loads(str(store['signature']))
+    if stored != signature:
+        if not build_feature_store(store_path, signature):
+            return None, None, None, None
+    else:
+        print(f"Using cached feature store {store_path}")
+
+    with np.load(store_path, allow_pickle=False) as store:
+        x_phys, x_video, x_audio, y = store['phys'], store['video'], store['audio'], store['y']
+
+    print(f"Loaded {len(y)} samples with all 3 modalities")
+    print(f"Class distribution: {pd.Series(y).value_counts().to_dict()}")
     print(f"Feature dimensions - Phys: {x_phys.shape[1]}, Video: {x_video.shape[1]}, Audio: {x_audio.shape[1]}")
-    
-    return x_phys.values, x_video.values, x_audio.values, y.values
 
-def train_model_with_dataset():
+    return x_phys, x_video, x_audio, y
+
+def train_model_with_dataset(store_path=FEATURE_STORE_PATH, rebuild=False, n_jobs=None):
     """
     Train the model using the actual dataset
     """
     # Load dataset
-    X_phys, X_video, X_audio, y = load_dataset()
+    X_phys, X_video, X_audio, y = load_dataset(store_path, rebuild)
     
     if X_phys is None:
         return False
@@ -141,7 +184,11 @@ def train_model_with_dataset():
     print("Training model (this may take a few minutes)...")
     print("="*60)
     # IMPORTANT: Order is X_facial (video), X_voice (audio), X_phys (physiological)
-    model.train(X_video_train_balanced, X_audio_train_balanced, X_phys_train_balanced, y_balanced)
+    report = model.train(X_video_train_balanced, X_audio_train_balanced, X_phys_train_balanced, y_balanced,
+                         n_jobs=n_jobs)
+    with open(TRAINING_REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Training report saved to {TRAINING_REPORT_PATH}")
     
     # Evaluate on test set
     print("\n" + "="*60)
@@ -153,28 +200,19 @@ def train_model_with_dataset():
     print(f"  Video: {X_video_test.shape}")
     print(f"  Audio: {X_audio_test.shape}")
     
-    correct = 0
     total = len(test_idx)
-    predictions = []
-    actuals = []
     
     print(f"\nPredicting {total} test samples...")
-    for i in range(total):
-        result = model.predict(
-            facial_features=X_video_test[i],  # Video features for facial model
-            voice_features=X_audio_test[i],    # Audio features for voice model
-            phys_features=X_phys_test[i],      # Physiological features
-            fusion='average'
-        )
-        
-        predicted = 1 if result['predicted_class'] == 'Stress' else 0
-        predictions.append(predicted)
-        actuals.append(y_test[i])
-        
-        if predicted == y_test[i]:
-            correct += 1
+    result = model.predict_batch(
+        facial=X_video_test,  # Video features for facial model
+        voice=X_audio_test,   # Audio features for voice model
+        phys=X_phys_test,     # Physiological features
+        fusion='average'
+    )
+    predictions = result['predicted']
+    actuals = y_test
     
-    accuracy = correct / total
+    accuracy = np.mean(predictions == actuals)
     
     # Calculate additional metrics
     from sklearn.metrics import classification_report, confusion_matrix, f1_score
@@ -191,6 +229,9 @@ def train_model_with_dataset():
     model_path = 'multimodal_stress_model.pkl'
     model.save_model(model_path)
     print(f"\n✅ Model saved to {model_path}")
+    artifact_path = 'multimodal_stress_model.msd'
+    model.export_artifact(artifact_path)
+    print(f"✅ Array artifact saved to {artifact_path}")
     
     return True
 
@@ -235,35 +276,50 @@ def create_demo_model():
     model_path = 'multimodal_stress_model.pkl'
     model.save_model(model_path)
     print(f"\n✅ Demo model saved to {model_path}")
+    artifact_path = 'multimodal_stress_model.msd'
+    model.export_artifact(artifact_path)
+    print(f"✅ Array artifact saved to {artifact_path}")
     print("\n⚠️  Remember to train with real data before production use!")
     
     return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multimodal Stress Detection Model Training")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    dataset_cmd = commands.add_parser('dataset', help="Train with the actual dataset (requires dataset files)")
+    dataset_cmd.add_argument('--store', default=FEATURE_STORE_PATH, help="feature store (.npz) to use or build")
+    dataset_cmd.add_argument('--rebuild', action='store_true', help="rebuild the feature store from the CSVs")
+    dataset_cmd.add_argument('--jobs', type=int, help="total cores for fitting the three models (default: all)")
+
+    commands.add_parser('demo', help="Create a demo model with synthetic data (for testing)")
+
+    store_cmd = commands.add_parser('build-store', help="Only build the feature store from the CSVs")
+    store_cmd.add_argument('--store', default=FEATURE_STORE_PATH)
+
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Multimodal Stress Detection Model Training")
     print("=" * 60)
-    print("\nChoose an option:")
-    print("1. Train with actual dataset (requires dataset files)")
-    print("2. Create demo model with synthetic data (for testing)")
-    
-    choice = input("\nEnter your choice (1 or 2): ").strip()
-    
-    if choice == '1':
-        success = train_model_with_dataset()
+
+    if args.command == 'build-store':
+        raise SystemExit(0 if build_feature_store(args.store) else 1)
+
+    if args.command == 'dataset':
+        success = train_model_with_dataset(args.store, args.rebuild, args.jobs)
         if not success:
             print("\n" + "="*60)
             print("⚠️  Dataset loading failed. You can:")
             print("   - Check that all dataset files exist at the specified paths")
-            print("   - Update the file paths in train_model.py (lines 22-25)")
-            print("   - Or run option 2 to create a demo model for testing")
+            print("   - Update the paths at the top of train_model.py")
+            print("   - Or run `python train_model.py demo` to create a demo model for testing")
             print("="*60)
-    elif choice == '2':
-        create_demo_model()
+            raise SystemExit(1)
     else:
-        print("Invalid choice. Please run the script again and choose 1 or 2.")
-    
+        create_demo_model()
+
     print("\n" + "=" * 60)
     print("Training complete!")
     print("You can now run app.py to start the Flask server")
-    print("=" * 60)
\ No newline at end of file
+    print("=" * 60)
@@ -0,0 +1,153 @@
+"""
+Stress analysis of recorded video
+
+Frames are decoded one at a time with cv2.VideoCapture and sampled at
+`sample_fps`; skipped frames are only grabbed (no colour conversion or copy).
+Sampled frames go through the same face tracking as the webcam stream
+(detect once, follow by template matching, re-detect on loss), and face crops
+are buffered up to `batch_size` before features and the facial model run on
+the whole batch. Only the current batch and per-second running sums are kept,
+so memory stays bounded regardless of the video's length.
+
+Usage:
+    python video_analysis.py recording.mp4 [--fps 2] [--model multimodal_stress_model.msd]
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from model import predicted_class, stress_level
+from webcam_stream import FaceTracker
+
+
+def iter_sampled_frames(path, sample_fps=2.0, max_seconds=None, info=None):
+    """Yield (timestamp_s, gray_frame) at roughly `sample_fps` frames per second
+
+    When given, `info` receives 'duration_seconds' once the frames run out:
+    frames decoded / fps, i.e. the video's length (up to `max_seconds`).
+    """
+    import cv2
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = max(1, int(round(fps / sample_fps)))
+        index = 0
+        while capture.grab():
+            timestamp = index / fps
+            if max_seconds is not None and timestamp > max_seconds:
+                break
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield timestamp, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            index += 1
+        if info is not None:
+            info['duration_seconds'] = index / fps
+    finally:
+        capture.release()
+
+
+class _Timeline:
+    """Per-second running sums of stress probabilities"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, timestamps, probabilities):
+        for timestamp, probability in zip(timestamps, probabilities):
+            if np.isnan(probability):
+                # Feature extraction failed for this frame
+                continue
+            entry = self.seconds.setdefault(int(timestamp), [0.0, 0])
+            entry[0] += float(probability)
+            entry[1] += 1
+
+    def rows(self):
+        rows = []
+        for second in sorted(self.seconds):
+            total, count = self.seconds[second]
+            rows.append({
+                'second': second,
+                'stress_probability': total / count,
+                'stress_level': stress_level(total / count),
+                'frames': count,
+            })
+        return rows
+
+
+def analyze_video(detector, path, sample_fps=2.0, batch_size=32, max_seconds=None):
+    """Per-second stress timeline and aggregate for a video file
+
+    detector: a trained MultimodalStressDetector (its facial model is used).
+    """
+    tracker = FaceTracker(detector.face_detector)
+    timeline = _Timeline()
+    batch_times, batch_rois = [], []
+    frames_sampled = 0
+    info = {'duration_seconds': 0.0}
+
+    def flush():
+        if not batch_rois:
+            return
+        features = detector.extract_facial_features_from_rois(batch_rois)
+        result = detector.predict_batch(facial=features)
+        timeline.add(batch_times, result['stress_probability'])
+        del batch_times[:], batch_rois[:]
+
+    for timestamp, gray in iter_sampled_frames(path, sample_fps, max_seconds, info):
+        frames_sampled += 1
+        box, _ = tracker.update(gray)
+        if box is None:
+            continue
+        x, y, w, h = box
+        batch_times.append(timestamp)
+        batch_rois.append(gray[y:y+h, x:x+w].copy())
+        if len(batch_rois) >= batch_size:
+            flush()
+    flush()
+
+    rows = timeline.rows()
+    frames_with_face = sum(row['frames'] for row in rows)
+    summary = {
+        'status': 'success',
+        'duration_seconds': info['duration_seconds'],
+        'sample_fps': sample_fps,
+        'frames_sampled': frames_sampled,
+        'frames_with_face': frames_with_face,
+        'face_coverage': frames_with_face / frames_sampled if frames_sampled else 0.0,
+        'timeline': rows,
+    }
+    if frames_with_face:
+        mean_probability = sum(row['stress_probability'] * row['frames'] for row in rows) / frames_with_face
+        peak = max(rows, key=lambda row: row['stress_probability'])
+        summary.update({
+            'stress_probability': mean_probability,
+            'predicted_class': predicted_class(mean_probability),
+            'stress_level': stress_level(mean_probability),
+            'percentage': mean_probability * 100,
+            'peak_second': peak['second'],
+            'peak_stress_probability': peak['stress_probability'],
+        })
+    return summary
+
+
+if __name__ == '__main__':
+    from model import MultimodalStressDetector
+
+    parser = argparse.ArgumentParser(description="Stress timeline for a video file")
+    parser.add_argument('video')
+    parser.add_argument('--fps', type=float, default=2.0, help="frames sampled per second")
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--model', default='multimodal_stress_model.pkl')
+    args = parser.parse_args()
+
+    detector = MultimodalStressDetector()
+    detector.load_model(args.model)
+    report = analyze_video(detector, args.video, args.fps, args.batch_size)
+    print(json.dumps(report, indent=2, default=float))
+    if 'stress_probability' in report:
+        print(f"Stress Level: {report['stress_level']} ({report['percentage']:.1f}%)")
@@ -1,14 +1,13 @@
+import json
 import os
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 import numpy as np
-import librosa
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from tensorflow.keras.models import Sequential, load_model
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
-from tensorflow.keras.utils import to_categorical
-import sounddevice as sd
-from scipy.io import wavfile
+from tflite_backend import load_inference_model
+
+# TensorFlow, sounddevice, librosa, pandas and scikit-learn are imported inside
+# the functions that need them so that serving (which may use the TFLite
+# backend) doesn't pay for them at import
 
 # --- Configuration ---
 base_dataset_path = r"D:/stress/stress-detection/src/audio"
@@ -21,6 +20,7 @@ intensity_map = {1: 'normal', 2: 'strong'}
 
 # --- Data Collection ---
 def collect_data():
+    import pandas as pd
     all_audio_data = []
     for actor_id in range(1, 25):
         actor_folder_name = f'Actor_{actor_id:02d}'
@@ -28,15 +28,10 @@ def collect_data():
         if not os.path.exists(actor_folder_path):
             print(f"Warning: Actor folder not found: {actor_folder_path}")
             continue
-        for filename in os.listdir(actor_folder_path):
+        for filename in sorted(os.listdir(actor_folder_path)):
             if filename.endswith('.wav'):
+                # Unreadable files are reported when their MFCCs are extracted
                 filepath = os.path.join(actor_folder_path, filename)
-                try:
-                    with open(filepath, 'rb') as f:
-                        pass
-                except (OSError, IOError) as e:
-                    print(f"Skipping invalid file: {filepath} ({e})")
-                    continue
                 parts = filename.split('-')
                 if len(parts) != 7:
                     print(f"Skipping malformed filename: {filename}")
@@ -91,35 +86,118 @@ def collect_data():
     return df_metadata
 
 # --- Feature Extraction ---
+def extract_mfcc_from_signal(y, sr, n_mfcc=13, max_length=200):
+    import librosa
+    mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
+    if mfcc.shape[1] < max_length:
+        mfcc = np.pad(mfcc, ((0, 0), (0, max_length - mfcc.shape[1])), mode='constant')
+    else:
+        mfcc = mfcc[:, :max_length]
+    return mfcc
+
 def extract_mfcc(file_path, n_mfcc=13, max_length=200):
+    import librosa
     try:
         y, sr = librosa.load(file_path, sr=None)
-        mfcc = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=n_mfcc)
-        if mfcc.shape[1] < max_length:
-            mfcc = np.pad(mfcc, ((0, 0), (0, max_length - mfcc.shape[1])), mode='constant')
-        else:
-            mfcc = mfcc[:, :max_length]
-        return mfcc
+        return extract_mfcc_from_signal(y, sr, n_mfcc, max_length)
     except Exception as e:
         print(f"Error extracting MFCC from {file_path}: {e}")
         return None
 
+# --- MFCC Store ---
+def _file_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime]
+
+def build_mfcc_store(filepaths, store_path='mfcc_store', n_mfcc=13, max_length=200, workers=None):
+    """Extract MFCCs for `filepaths` once and keep them in a memory-mapped array
+
+    The store is `<store_path>.npy` (rows x n_mfcc x max_length, float32) and a
+    `<store_path>.json` manifest of path, size and mtime per row. On reruns only
+    new or changed files are decoded, in a process pool (or in this process
+    when `workers` is 1 or less); unchanged rows are copied over from the
+    previous store. Files that fail to extract are remembered and retried
+    only once they change.
+
+    Returns (features, paths): the memory-mapped array and the file of each row.
+    """
+    npy_path, manifest_path = store_path + '.npy', store_path + '.json'
+    signatures = {}
+    for path in filepaths:
+        try:
+            signatures[path] = _file_signature(path)
+        except OSError as e:
+            print(f"Skipping invalid file: {path} ({e})")
+
+    previous = {'n_mfcc': n_mfcc, 'max_length': max_length, 'files': []}
+    if os.path.exists(manifest_path) and os.path.exists(npy_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    if previous['n_mfcc'] != n_mfcc or previous['max_length'] != max_length:
+        previous['files'] = []
+
+    # path -> (signature, row in the previous store or None if extraction failed)
+    known = {}
+    row = 0
+    for path, size, mtime, ok in previous['files']:
+        known[path] = ([size, mtime], row if ok else None)
+        row += ok
+
+    reused = {path: known[path][1] for path, signature in signatures.items()
+              if path in known and known[path][0] == signature}
+    pending = [path for path in signatures if path not in reused]
+    if not pending and len(reused) == len(previous['files']):
+        print(f"Reusing MFCC store: {npy_path} ({row} files)")
+        return np.load(npy_path, mmap_mode='r'), [path for path, *_, ok in previous['files'] if ok]
+
+    print(f"\n--- Extracting MFCC Features ({len(pending)} new or changed, {len(reused)} cached) ---")
+    extracted = {}
+    if workers is not None and workers <= 1:
+        for path in pending:
+            extracted[path] = extract_mfcc(path, n_mfcc, max_length)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(extract_mfcc, pending, repeat(n_mfcc), repeat(max_length), chunksize=8)
+            for path, mfcc in zip(pending, results):
+                extracted[path] = mfcc
+
+    files = []
+    for path in signatures:
+        ok = extracted[path] is not None if path in extracted else reused[path] is not None
+        files.append([path] + signatures[path] + [int(ok)])
+    rows = [path for path, *_, ok in files if ok]
+
+    old_store = np.load(npy_path, mmap_mode='r') if reused else None
+    tmp_path = store_path + '.tmp.npy'
+    store = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                      shape=(len(rows), n_mfcc, max_length))
+    for i, path in enumerate(rows):
+        store[i] = extracted[path] if path in extracted else old_store[reused[path]]
+    store.flush()
+    del store, old_store
+
+    # Drop the manifest first so an interrupted rebuild is not mistaken for a valid store
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    os.replace(tmp_path, npy_path)
+    with open(manifest_path, 'w') as f:
+        json.dump({'n_mfcc': n_mfcc, 'max_length': max_length, 'files': files}, f)
+    return np.load(npy_path, mmap_mode='r'), rows
+
 # --- Train Model ---
-def train_model():
+def train_model(store_path='mfcc_store', workers=None):
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Conv2D, MaxPooling2D, Flatten, Dense, Dropout
+    from tensorflow.keras.utils import to_categorical
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
     df_metadata = collect_data()
-    features = []
-    labels = []
-    print("\n--- Extracting MFCC Features ---")
-    for index, row in df_metadata.iterrows():
-        if row['stress_label'] != 'unknown':
-            mfcc = extract_mfcc(row['filepath'])
-            if mfcc is not None:
-                features.append(mfcc)
-                labels.append(row['stress_label'])
-    if not features:
+    df_metadata = df_metadata[df_metadata['stress_label'] != 'unknown']
+    features, paths = build_mfcc_store(df_metadata['filepath'].tolist(), store_path, workers=workers)
+    if not paths:
         raise ValueError("No valid features extracted. Check your dataset files.")
-    features = np.array(features)
-    labels = np.array(labels)
+    labels = df_metadata.set_index('filepath').loc[paths, 'stress_label'].to_numpy()
     label_encoder = LabelEncoder()
     encoded_labels = label_encoder.fit_transform(labels)
     num_classes = len(label_encoder.classes_)
@@ -147,10 +225,29 @@ def train_model():
     return model, label_encoder
 
 # --- Inference Functions ---
-def predict_stress_from_file(file_path, model, label_encoder, n_mfcc=13, max_length=200):
+def predict_stress_from_signal(y, sr, model, label_encoder, n_mfcc=13, max_length=200):
+    """Predict the stress label for an in-memory waveform"""
+    try:
+        mfcc = extract_mfcc_from_signal(y, sr, n_mfcc, max_length)
+        mfcc = mfcc[np.newaxis, ..., np.newaxis]
+        prediction = model.predict(mfcc)
+        predicted_label = label_encoder.inverse_transform([np.argmax(prediction)])
+        return predicted_label[0]
+    except Exception as e:
+        print(f"Error processing audio signal: {e}")
+        return None
+
+def predict_stress_from_file(file_path, model, label_encoder, n_mfcc=13, max_length=200, backend='keras'):
+    """Predict the stress label for an audio file
+
+    `model` is a loaded Keras or TFLite model, or a model path to load with
+    `backend` ('keras' or 'tflite', see tflite_backend.py).
+    """
     try:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
+        if isinstance(model, str):
+            model = load_inference_model(model, backend)
         mfcc = extract_mfcc(file_path, n_mfcc, max_length)
         if mfcc is None:
             raise ValueError("Failed to extract MFCC features")
@@ -164,15 +261,12 @@ def predict_stress_from_file(file_path, model, label_encoder, n_mfcc=13, max_len
 
 def record_and_predict(duration=3, fs=22050, model=None, label_encoder=None):
     try:
+        import sounddevice as sd
         print(f"Recording for {duration} seconds...")
         recording = sd.rec(int(duration * fs), samplerate=fs, channels=1)
         sd.wait()
-        temp_file = 'temp_recording.wav'
-        wavfile.write(temp_file, fs, recording.flatten())
-        print("Recording saved temporarily.")
-        stress_level = predict_stress_from_file(temp_file, model, label_encoder)
-        os.remove(temp_file)
-        return stress_level
+        # Predict straight from the recorded buffer; no temporary WAV file
+        return predict_stress_from_signal(recording.flatten(), fs, model, label_encoder)
     except Exception as e:
         print(f"Error during recording: {e}")
         return None
\ No newline at end of file
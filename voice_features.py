@@ -0,0 +1,164 @@
+"""
+Voice feature engine for the 140-dim voice vector
+
+All spectral features are derived from a single STFT per clip: one magnitude
+spectrogram, its power, and mel projections built from cached filterbanks.
+Only the time-domain features (zero crossing rate, RMS) read the waveform.
+
+Run `python voice_features.py clip.wav` to compare the engine against the
+per-feature librosa calls it replaces.
+"""
+
+import sys
+import numpy as np
+
+# librosa is imported on first use, so importing this module stays cheap
+
+N_VOICE_FEATURES = 140
+
+
+def _summary(values):
+    return [np.mean(values), np.std(values), np.median(values), np.max(values), np.min(values)]
+
+
+def _tempo_features(tempo, beats, y):
+    return [
+        float(np.atleast_1d(tempo)[0]),
+        len(beats),
+        np.std(np.diff(beats)) if len(beats) > 1 else 0,
+        np.mean(np.diff(beats)) if len(beats) > 1 else 0,
+        np.var(y)
+    ]
+
+
+def _rms_features(rms):
+    return [
+        np.mean(rms), np.std(rms), np.median(rms),
+        np.max(rms), np.min(rms), np.percentile(rms, 25),
+        np.percentile(rms, 75), np.var(rms),
+        np.max(rms) - np.min(rms), np.mean(np.abs(np.diff(rms)))
+    ]
+
+
+def _finalize(features):
+    features = np.array(features[:N_VOICE_FEATURES], dtype=np.float64)
+    if len(features) < N_VOICE_FEATURES:
+        features = np.pad(features, (0, N_VOICE_FEATURES - len(features)), 'constant')
+    return features
+
+
+class VoiceFeatureEngine:
+    def __init__(self, n_fft=2048, hop_length=512, n_mfcc=20):
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mfcc = n_mfcc
+        self._mel_bases = {}
+
+    def mel_basis(self, sr, n_mels):
+        """Mel filterbank for (sr, n_mels), built once and reused"""
+        key = (sr, n_mels)
+        basis = self._mel_bases.get(key)
+        if basis is None:
+            import librosa
+            basis = librosa.filters.mel(sr=sr, n_fft=self.n_fft, n_mels=n_mels)
+            self._mel_bases[key] = basis
+        return basis
+
+    def extract(self, y, sr):
+        """Compute the 140 voice features for waveform `y` at rate `sr`"""
+        import librosa
+        # One STFT for the whole clip
+        S = np.abs(librosa.stft(y, n_fft=self.n_fft, hop_length=self.hop_length))
+        power = S ** 2
+        log_mel = librosa.power_to_db(self.mel_basis(sr, 128).dot(power))
+
+        features = []
+
+        # 1. MFCC features (40 features: 20 MFCCs * 2 stats)
+        mfccs = librosa.feature.mfcc(S=log_mel, n_mfcc=self.n_mfcc)
+        features.extend(np.mean(mfccs, axis=1))
+        features.extend(np.std(mfccs, axis=1))
+
+        # 2. Spectral features (15 features)
+        centroid = librosa.feature.spectral_centroid(S=S, sr=sr)
+        rolloff = librosa.feature.spectral_rolloff(S=S, sr=sr)[0]
+        bandwidth = librosa.feature.spectral_bandwidth(S=S, sr=sr, centroid=centroid)[0]
+        features.extend(_summary(centroid[0]) + _summary(rolloff) + _summary(bandwidth))
+
+        # 3. Zero crossing rate (5 features)
+        features.extend(_summary(librosa.feature.zero_crossing_rate(y, hop_length=self.hop_length)[0]))
+
+        # 4. Chroma features (24 features: 12 chroma * 2 stats)
+        chroma = librosa.feature.chroma_stft(S=power, sr=sr)
+        features.extend(np.mean(chroma, axis=1))
+        features.extend(np.std(chroma, axis=1))
+
+        # 5. Tempo and rhythm (5 features), onset envelope from the shared log-mel
+        onset_env = librosa.onset.onset_strength(S=log_mel, sr=sr, aggregate=np.median)
+        tempo, beats = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=self.hop_length)
+        features.extend(_tempo_features(tempo, beats, y))
+
+        # 6. RMS Energy (10 features)
+        features.extend(_rms_features(librosa.feature.rms(y=y, hop_length=self.hop_length)[0]))
+
+        # 7. Mel spectrogram statistics (16 features)
+        mel_spec = self.mel_basis(sr, 8).dot(power)
+        for band in mel_spec:
+            features.extend([np.mean(band), np.std(band)])
+
+        # 8. Spectral contrast (12 features: 6 bands * 2 stats)
+        contrast = librosa.feature.spectral_contrast(S=S, sr=sr, n_bands=5)
+        features.extend(np.mean(contrast, axis=1))
+        features.extend(np.std(contrast, axis=1))
+
+        return _finalize(features)
+
+
+def reference_features(y, sr):
+    """Per-feature librosa pipeline the engine replaces (one STFT per call)"""
+    import librosa
+    features = []
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=20)
+    features.extend(np.mean(mfccs, axis=1))
+    features.extend(np.std(mfccs, axis=1))
+    features.extend(_summary(librosa.feature.spectral_centroid(y=y, sr=sr)[0])
+                    + _summary(librosa.feature.spectral_rolloff(y=y, sr=sr)[0])
+                    + _summary(librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]))
+    features.extend(_summary(librosa.feature.zero_crossing_rate(y)[0]))
+    chroma = librosa.feature.chroma_stft(y=y, sr=sr)
+    features.extend(np.mean(chroma, axis=1))
+    features.extend(np.std(chroma, axis=1))
+    tempo, beats = librosa.beat.beat_track(y=y, sr=sr)
+    features.extend(_tempo_features(tempo, beats, y))
+    features.extend(_rms_features(librosa.feature.rms(y=y)[0]))
+    mel_spec = librosa.feature.melspectrogram(y=y, sr=sr, n_mels=8)
+    for band in mel_spec:
+        features.extend([np.mean(band), np.std(band)])
+    contrast = librosa.feature.spectral_contrast(y=y, sr=sr, n_bands=5)
+    features.extend(np.mean(contrast, axis=1))
+    features.extend(np.std(contrast, axis=1))
+    return _finalize(features)
+
+
+def check_parity(y, sr, rtol=1e-4, atol=1e-6):
+    """Compare the engine with the reference pipeline; returns (ok, max_abs_diff)"""
+    engine = VoiceFeatureEngine().extract(y, sr)
+    reference = reference_features(y, sr)
+    return bool(np.allclose(engine, reference, rtol=rtol, atol=atol)), float(np.max(np.abs(engine - reference)))
+
+
+if __name__ == '__main__':
+    import time
+    import librosa
+
+    for path in sys.argv[1:]:
+        y, sr = librosa.load(path, duration=30)
+        start = time.perf_counter()
+        VoiceFeatureEngine().extract(y, sr)
+        engine_time = time.perf_counter() - start
+        start = time.perf_counter()
+        reference_features(y, sr)
+        reference_time = time.perf_counter() - start
+        ok, diff = check_parity(y, sr)
+        print(f"{path}: parity={'OK' if ok else 'MISMATCH'} max_abs_diff={diff:.3g} "
+              f"engine={engine_time * 1000:.0f}ms reference={reference_time * 1000:.0f}ms")
@@ -0,0 +1,115 @@
+"""
+Incremental MFCCs and live stress estimates for streamed audio
+
+StreamingMFCC consumes PCM chunks as they arrive and computes each STFT frame
+exactly once: samples wait in a small pending buffer until a full window is
+available, every complete frame goes through window -> FFT -> mel -> dB, and
+the log-mel frames are kept in a ring holding the last `max_frames` frames
+(the CNN's input width). The same framing as librosa.feature.mfcc is used
+(Hann window, n_fft=2048, hop=512, centered with zero padding, 128 mels).
+
+Only the cheap final steps run per estimate: the 80 dB floor relative to the
+window's peak and the DCT to 13 coefficients, which is what an offline
+`librosa.feature.mfcc` over the same samples would do.
+"""
+
+from collections import deque
+import numpy as np
+import scipy.fft
+
+SAMPLE_FORMATS = {'int16': ('<i2', 1 / 32768.0), 'float32': ('<f4', 1.0)}
+
+
+class StreamingMFCC:
+    def __init__(self, sr, n_mfcc=13, n_fft=2048, hop_length=512, n_mels=128, max_frames=200, top_db=80.0):
+        self.sr = sr
+        self.n_mfcc = n_mfcc
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.max_frames = max_frames
+        self.top_db = top_db
+        # Imported here so that importing this module (server.py at startup) stays cheap
+        import librosa
+        import scipy.signal
+        self._window = scipy.signal.get_window('hann', n_fft, fftbins=True).astype(np.float32)
+        self._mel_basis = librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+        # Centered framing: the first frame is centred on sample 0
+        self._pending = np.zeros(n_fft // 2, dtype=np.float32)
+        self._frames = deque(maxlen=max_frames)
+        self.samples_seen = 0
+
+    def push(self, samples):
+        """Add mono float samples; returns the number of new frames computed"""
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        self.samples_seen += len(samples)
+        self._pending = np.concatenate([self._pending, samples])
+        if len(self._pending) < self.n_fft:
+            return 0
+
+        n_new = 1 + (len(self._pending) - self.n_fft) // self.hop_length
+        frames = np.lib.stride_tricks.sliding_window_view(self._pending, self.n_fft)[::self.hop_length][:n_new]
+        power = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        log_mel = 10.0 * np.log10(np.maximum(1e-10, power.dot(self._mel_basis.T)))
+        self._frames.extend(log_mel)
+
+        # Keep only the samples that later frames still need
+        self._pending = self._pending[n_new * self.hop_length:].copy()
+        return n_new
+
+    @property
+    def n_frames(self):
+        return len(self._frames)
+
+    def mfcc(self):
+        """(n_mfcc, max_frames) MFCCs of the buffered window, zero-padded like voice.extract_mfcc"""
+        out = np.zeros((self.n_mfcc, self.max_frames), dtype=np.float32)
+        if not self._frames:
+            return out
+        log_mel = np.array(self._frames).T
+        log_mel = np.maximum(log_mel, log_mel.max() - self.top_db)
+        coefficients = scipy.fft.dct(log_mel, axis=0, type=2, norm='ortho')[:self.n_mfcc]
+        out[:, :coefficients.shape[1]] = coefficients
+        return out
+
+
+class VoiceStreamSession:
+    """Turns a stream of PCM chunks into a stress estimate every `hop_seconds`"""
+
+    def __init__(self, model, label_encoder, sample_rate, sample_format='int16', hop_seconds=0.5):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unsupported sample format '{sample_format}' (expected one of {list(SAMPLE_FORMATS)})")
+        self.model = model
+        self.label_encoder = label_encoder
+        dtype, self.scale = SAMPLE_FORMATS[sample_format]
+        self.dtype = np.dtype(dtype)
+        self._remainder = b''
+        self.hop_samples = max(1, int(hop_seconds * sample_rate))
+        self.features = StreamingMFCC(sample_rate)
+        self._next_emit = self.hop_samples
+
+    def push_bytes(self, chunk):
+        """Feed one little-endian PCM chunk; returns a new estimate or None"""
+        # Chunks may split a sample; carry the odd bytes over to the next one
+        data = self._remainder + bytes(chunk)
+        usable = len(data) - len(data) % self.dtype.itemsize
+        self._remainder = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype=self.dtype).astype(np.float32) * self.scale
+        self.features.push(samples)
+
+        # At most one estimate per chunk, on the latest window; hops that
+        # elapsed inside a single large chunk are not replayed
+        if self.features.samples_seen < self._next_emit or not self.features.n_frames:
+            return None
+        while self._next_emit <= self.features.samples_seen:
+            self._next_emit += self.hop_samples
+        return self.estimate()
+
+    def estimate(self):
+        """Run the voice CNN on the current MFCC window"""
+        prediction = self.model.predict(self.features.mfcc()[np.newaxis, ..., np.newaxis])[0]
+        label = self.label_encoder.inverse_transform([int(np.argmax(prediction))])[0]
+        return {
+            'label': label,
+            'probabilities': {str(name): float(p) for name, p in zip(self.label_encoder.classes_, prediction)},
+            'time': self.features.samples_seen / float(self.features.sr),
+        }
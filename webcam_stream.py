@@ -0,0 +1,172 @@
+"""
+Continuous webcam monitoring with face tracking
+
+Running the Haar cascade on every frame dominates per-frame cost. A
+WebcamStreamSession instead:
+
+    - skips near-duplicate frames: a 64-bit difference hash (dHash) of the
+      frame is compared with the last processed one, and frames within a few
+      bits reuse the previous result
+    - detects the face once, then tracks it by normalized cross-correlation
+      of the last face crop in a window around its previous position,
+      re-detecting only when the match is lost (or every `redetect_every`
+      tracked frames, to correct drift and scale changes)
+    - smooths the per-frame stress probability with an exponential moving
+      average whose weight depends on elapsed time, so the score behaves the
+      same at any frame rate
+"""
+
+import math
+import threading
+import time
+import numpy as np
+from model import stress_level
+
+# cv2 is imported inside the functions that need it, so importing this module
+# (app.py at startup) doesn't load OpenCV
+
+
+def dhash(gray, hash_size=8):
+    """Difference hash of a grayscale image as an int (hash_size**2 bits)"""
+    import cv2
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class FaceTracker:
+    def __init__(self, face_detector, min_score=0.6, search_margin=0.5, redetect_every=30):
+        """
+        face_detector: face_detection.FaceDetector used for (re-)detection.
+        min_score: lowest template-match correlation still counted as tracked.
+        search_margin: search window around the last box, as a fraction of its size.
+        """
+        self.face_detector = face_detector
+        self.min_score = min_score
+        self.search_margin = search_margin
+        self.redetect_every = redetect_every
+        self.reset()
+
+    def reset(self):
+        self.box = None
+        self.template = None
+        self.tracked_frames = 0
+
+    def _set(self, gray, box):
+        x, y, w, h = box
+        self.box = box
+        self.template = gray[y:y+h, x:x+w].copy()
+
+    def _track(self, gray):
+        import cv2
+        x, y, w, h = self.box
+        height, width = gray.shape[:2]
+        mx, my = int(w * self.search_margin), int(h * self.search_margin)
+        x0, y0 = max(0, x - mx), max(0, y - my)
+        x1, y1 = min(width, x + w + mx), min(height, y + h + my)
+        region = gray[y0:y1, x0:x1]
+        if region.shape[0] < h or region.shape[1] < w:
+            return None
+
+        scores = cv2.matchTemplate(region, self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+        if score < self.min_score:
+            return None
+        return (x0 + dx, y0 + dy, w, h)
+
+    def update(self, gray):
+        """Locate the face in a new frame
+
+        Returns (box, source): source is 'tracked' or 'detected', and box is
+        None when no face was found.
+        """
+        if self.box is not None and self.tracked_frames < self.redetect_every:
+            box = self._track(gray)
+            if box is not None:
+                self._set(gray, box)
+                self.tracked_frames += 1
+                return box, 'tracked'
+
+        box = self.face_detector.largest_face(gray)
+        if box is None:
+            self.reset()
+            return None, 'detected'
+        self._set(gray, box)
+        self.tracked_frames = 0
+        return box, 'detected'
+
+
+class WebcamStreamSession:
+    def __init__(self, detector, smoothing_seconds=2.0, duplicate_distance=4, redetect_every=30):
+        """
+        detector: a trained MultimodalStressDetector.
+        smoothing_seconds: time constant of the moving average.
+        duplicate_distance: max dHash bit difference for a frame to be skipped.
+        """
+        self.detector = detector
+        self.tracker = FaceTracker(detector.face_detector, redetect_every=redetect_every)
+        self.smoothing_seconds = smoothing_seconds
+        self.duplicate_distance = duplicate_distance
+        self.smoothed = None
+        self._smoothed_at = None
+        self._last_hash = None
+        self._last_result = None
+        self.counters = {'frames': 0, 'skipped': 0, 'detected': 0, 'tracked': 0, 'no_face': 0}
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.lock = threading.Lock()
+
+    def _smooth(self, probability, now):
+        if self.smoothed is None:
+            self.smoothed = probability
+        else:
+            alpha = 1.0 - math.exp(-(now - self._smoothed_at) / self.smoothing_seconds)
+            self.smoothed += alpha * (probability - self.smoothed)
+        self._smoothed_at = now
+        return self.smoothed
+
+    def push_frame(self, image_bytes):
+        """Process one encoded frame (JPEG/PNG bytes); returns the current estimate"""
+        import cv2
+        with self.lock:
+            now = time.time()
+            self.updated_at = now
+            self.counters['frames'] += 1
+
+            # Only the luma plane is needed for hashing, tracking and features
+            gray = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                raise ValueError('Could not decode frame')
+
+            frame_hash = dhash(gray)
+            if (self._last_result is not None
+                    and hamming(frame_hash, self._last_hash) <= self.duplicate_distance):
+                self.counters['skipped'] += 1
+                return dict(self._last_result, skipped=True, counters=dict(self.counters))
+            self._last_hash = frame_hash
+
+            box, source = self.tracker.update(gray)
+            result = {'status': 'success', 'face_found': box is not None, 'tracking': source}
+            if box is None:
+                self.counters['no_face'] += 1
+            else:
+                self.counters[source] += 1
+                x, y, w, h = box
+                features = self.detector.extract_facial_features_from_roi(gray[y:y+h, x:x+w])
+                prediction = self.detector.predict(facial_features=features)
+                if 'error' in prediction:
+                    raise RuntimeError(prediction['error'])
+                result['face_box'] = [int(x), int(y), int(w), int(h)]
+                result['frame_probability'] = prediction['stress_probability']
+                self._smooth(prediction['stress_probability'], now)
+
+            if self.smoothed is not None:
+                result['stress_probability'] = self.smoothed
+                result['stress_level'] = stress_level(self.smoothed)
+                result['percentage'] = self.smoothed * 100
+            self._last_result = result
+            return dict(result, skipped=False, counters=dict(self.counters))